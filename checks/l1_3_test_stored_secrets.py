@@ -1,46 +1,45 @@
-import subprocess
 import json
+from utils.github_api import GitHubAPIError
+from utils.org_alerts import alerts_readable
+from utils.repo_metadata import get_repo_metadata
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Secret scanning alerts" repository permissions (read)
 # Rule: L1.3 (Test for stored secrets): Check if secret scanning is enabled and for any alerts
 # Ideas: Check if secret scanning is enabled for the repository
 #        Could be extended to check for specific types of secrets or the number of open alerts
 
+INVALIDATED_BY = ['settings']
+TTL = 24 * 60 * 60
+
 def check_l1_3_test_stored_secrets(repo):
     try:
-        # Check for secret scanning alerts if enabled
-        alerts_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/secret-scanning/alerts'],
-            capture_output=True, text=True
-        )
+        # Check for secret scanning alerts if enabled; the org-wide listing and the repo's security
+        # settings (utils/org_alerts.py) settle this without a probe where they can
+        alerts_ok = alerts_readable(repo, 'secret_scanning_alerts', f'/repos/{repo}/secret-scanning/alerts')
 
         # Check if secret scanning is enabled
-        security_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}'],
-            capture_output=True, text=True
-        )
-
-        if alerts_result.returncode == 0 and security_result.returncode == 0:
-            # Parse the repository data JSON
-            repo_data = json.loads(security_result.stdout)
+        repo_data = get_repo_metadata(repo)
+
+        if alerts_ok and repo_data is not None:
             security_and_analysis = repo_data.get('security_and_analysis', {})
             secret_scanning = security_and_analysis.get('secret_scanning', {})
 
             status = []
             if secret_scanning.get('status') == 'enabled':
                 status.append("Secret scanning enabled")
-                return f"Detected: {', '.join(status)}"
+                return passed(f"Detected: {', '.join(status)}", metric=len(status), evidence=status)
             else:
-                return "Not detected"
+                return failed()
 
-        elif alerts_result.returncode != 0:
-            return "Not enabled"
+        elif not alerts_ok:
+            return failed("Not enabled")
         else:
-            return "Unable to check"
+            return unable_to_check()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error"
+        return error("Error")
     except Exception as e:
-        return "Error exception"
+        return error()
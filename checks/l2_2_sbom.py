@@ -1,32 +1,32 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Dependency graph" repository permissions (read)
 # Rule: L2.2 (SBOM of components): Check if a Software Bill of Materials (SBOM) is available for the repository
 # Ideas: Check for the existence of an SBOM and count the number of packages
 #        Could be extended to analyze specific package types or versions
 
+INVALIDATED_BY = ['push']
+
 def check_l2_2_sbom(repo):
     try:
-        # Use GitHub CLI to fetch the SBOM (Software Bill of Materials) for the repository
-        result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/dependency-graph/sbom'],
-            capture_output=True, text=True, check=True
-        )
+        # Use the GitHub API to fetch the SBOM (Software Bill of Materials) for the repository
+        result = gh_api(f'/repos/{repo}/dependency-graph/sbom', check=True)
 
-        if result.returncode == 0:
+        if result.ok:
             # Parse the JSON output into a Python object
-            sbom_data = json.loads(result.stdout)
+            sbom_data = result.json()
 
             # Count the number of packages in the SBOM
             package_count = len(sbom_data['sbom'].get('packages', []))
-            return f"Detected ({package_count} packages)"
+            return passed(f"Detected ({package_count} packages)", metric=package_count)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
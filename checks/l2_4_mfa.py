@@ -1,43 +1,48 @@
-import subprocess
 import json
+from utils.github_api import GitHubAPIError
+from utils.owners import entity_memo, get_mfa_roster, get_owner, repo_owner
+from utils.check_result import error, failed, passed, unable_to_check
 
-# Required Github permissions: "User" permissions (read)
+# Required Github permissions: "User" permissions (read); "Members" organization permissions (read) and
+#                               organization owner for the MFA roster of organization members and collaborators
 # Rule: L2.4 (MFA enabled): Check if Multi-Factor Authentication is enabled for the repository owner
-# Ideas: Check MFA status for the repository owner
-#        Could be extended to check MFA status for all collaborators or organization members
+# Ideas: Check MFA status for the repository owner, or for all members and outside collaborators of an organization
+
+INVALIDATED_BY = []
+TTL = 24 * 60 * 60
+
+def evaluate_owner_mfa(owner):
+    # None when the owner could not be checked
+    owner_info = get_owner(owner)
+    if owner_info is None:
+        return None
+
+    if owner_info.get('type') == 'Organization':
+        # Members and outside collaborators without MFA, when the token can see them
+        roster = get_mfa_roster(owner)
+        if roster is not None:
+            without_mfa = roster['members_without_mfa'] + (roster['collaborators_without_mfa'] or [])
+            if without_mfa:
+                return failed(f"Not Enabled ({len(without_mfa)} without MFA)", metric=len(without_mfa), evidence=without_mfa)
+            return passed(f"MFA Enabled for all members of {owner}")
+
+    # Check MFA status for the repository owner
+    if owner_info.get('two_factor_authentication'):
+        return passed(f"MFA Enabled for {owner}")
+    else:
+        return failed("Not Enabled")
 
 def check_l2_4_mfa(repo):
     try:
-        # Get the repository owner using GitHub CLI
-        owner_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}'],
-            capture_output=True, text=True
-        )
-        if owner_result.returncode == 0:
-            # Parse the JSON output to get the owner's login
-            repo_info = json.loads(owner_result.stdout)
-            owner = repo_info['owner']['login']
-        else:
-            return "Unable to check"
-
-        # Check MFA status for the repository owner
-        user_result = subprocess.run(
-            ['gh', 'api', f'/users/{owner}'],
-            capture_output=True, text=True
-        )
-        if user_result.returncode == 0:
-            # Parse the JSON output to get the user's information
-            user_info = json.loads(user_result.stdout)
-            if user_info.get('two_factor_authentication'):
-                return f"MFA Enabled for {owner}"
-            else:
-                return f"Not Enabled"
-        else:
-            return "Unable to check"
-
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+        owner = repo_owner(repo)
+
+        # Evaluated once per owner and shared by all of that owner's repos
+        result = entity_memo(('l2_4_mfa', owner), lambda: evaluate_owner_mfa(owner))
+        return result if result is not None else unable_to_check()
+
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,11 +1,19 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.keyword_matcher import find_keywords, register_keywords
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" and "Actions" repository permissions (read)
 # Rule: L2.5 (Software Composition Analysis - server side): Check for server-side SCA implementation
 # Ideas: Check for SCA configuration files and GitHub Actions workflows related to SCA
 #        Could be extended to check for specific SCA tool integrations or scan results
 
+# Keywords that might indicate SCA workflows, matched against workflow names
+WORKFLOW_NAME_KEYWORDS = register_keywords('l2_5_serverside_sca', ['dependency', 'sca', 'composition', 'snyk'])
+
+INVALIDATED_BY = ['push']
+
 def check_l2_5_serverside_sca(repo):
     try:
         sca_indicators = []
@@ -17,39 +25,30 @@ def check_l2_5_serverside_sca(repo):
             '.snyk',                 # Snyk
         ]
 
-        # Use GitHub CLI to check for the existence of each SCA config file
+        # Use the GitHub API to check for the existence of each SCA config file
         for file in sca_files:
-            result = subprocess.run(
-                ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
+            if repo_file_exists(repo, file):
                 sca_indicators.append(f"Config file: {file}")
 
         # Check for GitHub Actions workflows related to SCA
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
+        actions_result = gh_api(f'/repos/{repo}/actions/workflows')
 
-        if actions_result.returncode == 0:
+        if actions_result.ok:
             # Parse the JSON output of workflows
-            workflows = json.loads(actions_result.stdout)
-            # Define keywords that might indicate SCA-related workflows
-            sca_keywords = ['dependency', 'sca', 'composition', 'snyk']
+            workflows = actions_result.json()
             for workflow in workflows['workflows']:
                 # Check if any SCA keyword is in the workflow name
-                if any(keyword in workflow['name'].lower() for keyword in sca_keywords):
+                if find_keywords(WORKFLOW_NAME_KEYWORDS, workflow['name']):
                     sca_indicators.append(f"GitHub Action: {workflow['name']}")
 
         if sca_indicators:
-            return f"Server-side SCA detected: {', '.join(sca_indicators)}"
+            return passed(f"Server-side SCA detected: {', '.join(sca_indicators)}", metric=len(sca_indicators), evidence=sca_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
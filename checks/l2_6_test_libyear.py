@@ -1,11 +1,15 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" and "Actions" repository permissions (read)
 # Rule: L2.6 (Test libyear): Check for implementation of libyear testing
 # Ideas: Check for libyear configuration files and GitHub Actions workflows related to libyear
 #        Could be extended to analyze libyear results or check for specific libyear thresholds
 
+INVALIDATED_BY = ['push']
+
 def check_l2_6_test_libyear(repo):
     try:
         libyear_indicators = []
@@ -18,37 +22,30 @@ def check_l2_6_test_libyear(repo):
             '.libyearrc'
         ]
 
-        # Use GitHub CLI to check for the existence of each libyear config file
+        # Use the GitHub API to check for the existence of each libyear config file
         for file in libyear_files:
-            result = subprocess.run(
-                ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
+            if repo_file_exists(repo, file):
                 libyear_indicators.append(f"Config file: {file}")
 
         # Check for GitHub Actions workflows related to libyear
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
+        actions_result = gh_api(f'/repos/{repo}/actions/workflows')
 
-        if actions_result.returncode == 0:
+        if actions_result.ok:
             # Parse the JSON output of workflows
-            workflows = json.loads(actions_result.stdout)
+            workflows = actions_result.json()
             for workflow in workflows['workflows']:
                 # Check if 'libyear' is mentioned in the workflow name
                 if 'libyear' in workflow['name'].lower():
                     libyear_indicators.append(f"GitHub Action: {workflow['name']}")
 
         if libyear_indicators:
-            return f"Libyear testing implemented: {', '.join(libyear_indicators)}"
+            return passed(f"Libyear testing implemented: {', '.join(libyear_indicators)}", metric=len(libyear_indicators), evidence=libyear_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
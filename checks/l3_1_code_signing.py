@@ -1,5 +1,7 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_facts import repo_fact
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" repository permissions (read)
 # L3.1 (Code Signing)
@@ -7,21 +9,24 @@ import json
 # Rule:  Check if the last commit is signed
 # Ideas: Check if the main branch has required_signatures enabled (Prevent merging unsigned commits)
 #        Check if the last x commits are signed (Ensure that signed commits are being used in the past)
+INVALIDATED_BY = ['push']
+
 def check_l3_1_code_signing(repo):
     try:
-        result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/commits'],
-            capture_output=True, text=True, check=True
-        )
-        commits = json.loads(result.stdout)
-        if commits[0]['commit']['verification']['verified']:
-            return "Enabled" 
+        # Prefetched by the GraphQL batch backend when enabled
+        verified = repo_fact(repo, 'last_commit_verified')
+        if verified is None:
+            result = gh_api(f'/repos/{repo}/commits', check=True)
+            commits = result.json()
+            verified = commits[0]['commit']['verification']['verified']
+        if verified:
+            return passed("Enabled")
         else:
-            return "Not detected"
+            return failed()
             
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error"
+        return error("Error")
     except Exception as e:
-        return "Error exception"
+        return error()
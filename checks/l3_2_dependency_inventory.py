@@ -1,39 +1,36 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" repository permissions (read)
 # Rule: Inventory of dependencies
 # Ideas: Check for the presence of a Software Bill of Materials (SBOM) or dependency graph
 #        Could be extended to analyze specific dependency management files or tools
 
+INVALIDATED_BY = ['push']
+
 def check_l3_2_dependency_inventory(repo):
     try:
         # Check for SBOM
-        sbom_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/dependency-graph/sbom'],
-            capture_output=True, text=True
-        )
+        sbom_result = gh_api(f'/repos/{repo}/dependency-graph/sbom')
         
         # Check for dependency graph
-        graph_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/dependency-graph/dependencies'],
-            capture_output=True, text=True
-        )
+        graph_result = gh_api(f'/repos/{repo}/dependency-graph/dependencies')
         
-        if sbom_result.returncode == 0:
-            sbom_data = json.loads(sbom_result.stdout)
+        if sbom_result.ok:
+            sbom_data = sbom_result.json()
             package_count = len(sbom_data['sbom'].get('packages', []))
-            return f"Detected (SBOM with {package_count} packages)"
-        elif graph_result.returncode == 0:
-            graph_data = json.loads(graph_result.stdout)
+            return passed(f"Detected (SBOM with {package_count} packages)", metric=package_count)
+        elif graph_result.ok:
+            graph_data = graph_result.json()
             dependency_count = sum(len(manifest['dependencies']) for manifest in graph_data.get('dependencies', []))
-            return f"Detected (Dependency graph with {dependency_count} dependencies)"
+            return passed(f"Detected (Dependency graph with {dependency_count} dependencies)", metric=dependency_count)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,5 +1,8 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.pull_requests import get_pull_requests
+from utils.repo_facts import repo_fact
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Pull requests" repository permissions (read)
 # L3.1 (Version Update Approvals)
@@ -9,25 +12,38 @@ import json
 # Ideas: Check if the main branch has prtection rule that allow only to be merged with at least 1 approval (Prevent merging unsigned commits)
 #        Check if the last x prs are has reviewer (Ensure that two eyes principle are being used in the past)
 #        Some PRs are automated so it will not have a review for example the PRs that are created by dependabot 
+INVALIDATED_BY = ['activity']
+
 def check_l3_3_version_update_approvals(repo):
     try:
-        result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/pulls'],
-            capture_output=True, text=True, check=True
-        )
-        pull_requests = json.loads(result.stdout)
+        # Prefetched by the GraphQL batch backend when enabled
+        open_pull_requests = repo_fact(repo, 'open_pull_requests')
+        if open_pull_requests is not None:
+            reviewers = repo_fact(repo, 'latest_pr_user_reviewers') or 0
+        else:
+            pull_requests = get_pull_requests(repo)
+            if pull_requests is None:
+                raise GitHubAPIError(0, "Pull requests not readable")
+            latest_open = pull_requests.latest_open()
+            if latest_open is None and not pull_requests.complete:
+                # Open PRs older than the shared dataset: ask for the newest one directly
+                result = gh_api(f'/repos/{repo}/pulls?per_page=1', check=True)
+                open_prs = result.json()
+                latest_open = {'requested_reviewers': len(open_prs[0]['requested_reviewers'])} if open_prs else None
+            open_pull_requests = 0 if latest_open is None else 1
+            reviewers = latest_open['requested_reviewers'] if latest_open else 0
         
-        if len(pull_requests) == 0:
-            return "No PRs"
+        if open_pull_requests == 0:
+            return failed("No PRs")
         
-        if len(pull_requests[0]['requested_reviewers']) > 0:
-            return 'Last PR requested for review'
+        if reviewers > 0:
+            return passed('Last PR requested for review')
         else:
-            return 'Not Detected'
+            return failed("Not Detected")
                     
-    except subprocess.CalledProcessError as e:
-        return "Unable to check"
+    except GitHubAPIError as e:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error"
+        return error("Error")
     except Exception as e:
-        return "Error exception"
+        return error()
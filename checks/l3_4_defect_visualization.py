@@ -1,26 +1,31 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_facts import repo_fact
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Administration" repository permissions (read)
 # L3.4 (Defect visualization) NOTE: on others checks this is considered a L2
 # Description: Vulnerabilities are simple visualized.
 # Rule: Check if the repository has vulnerability alerts enabled
 # Ideas: Check if dependabot is enabled
+INVALIDATED_BY = ['settings']
+TTL = 24 * 60 * 60
+
 def check_l3_4_defect_visualization(repo):
     try:
-        result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/vulnerability-alerts'],
-            capture_output=True, text=True, check=True
-        )
-        if result.returncode == 0:
-            return f"Vulnerability alerts are enabled for the repository."
+        # Prefetched by the GraphQL batch backend when enabled
+        enabled = repo_fact(repo, 'vulnerability_alerts_enabled')
+        if enabled is None:
+            enabled = gh_api(f'/repos/{repo}/vulnerability-alerts', check=True).ok
+        if enabled:
+            return passed(f"Vulnerability alerts are enabled for the repository.")
         else:
-            return f"Not Enabled"
+            return failed("Not Enabled")
           
-    except subprocess.CalledProcessError as e:
-        return "Unable to check"
+    except GitHubAPIError as e:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error"
+        return error("Error")
     except Exception as e:
         #return f"Error: {str(e)}"
-        return "Error exception"
+        return error()
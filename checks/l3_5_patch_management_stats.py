@@ -1,21 +1,23 @@
-import subprocess
 import json
+from utils.github_api import GitHubAPIError
+from utils.pull_requests import get_pull_requests
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" and "Pull requests" repository permissions (read)
 # Rule: Generation of Patch Management Statistics
 # Ideas: Check for pull requests related to dependency updates and security patches
 #        Could be extended to analyze merge frequency and patch application time
 
+INVALIDATED_BY = ['activity']
+
 def check_l3_5_patch_management_stats(repo):
     try:
         # Check for dependency update PRs
-        dependency_prs = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/pulls?state=all&per_page=100'],
-            capture_output=True, text=True
-        )
+        pull_requests = get_pull_requests(repo)
         
-        if dependency_prs.returncode == 0:
-            prs = json.loads(dependency_prs.stdout)
+        if pull_requests is not None:
+            # The latest 100 PRs of the shared pull request dataset
+            prs = pull_requests.latest()
             update_prs = [pr for pr in prs if 'dependency' in pr['title'].lower() or 'update' in pr['title'].lower()]
             
             # Check for security patch PRs
@@ -23,13 +25,13 @@ def check_l3_5_patch_management_stats(repo):
             
             if update_prs or security_prs:
                 stats = f"Detected ({len(update_prs)} dependency updates, {len(security_prs)} security patches)"
-                return stats
+                return passed(stats, metric=len(update_prs) + len(security_prs))
         
-        return "Not detected"
+        return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,35 +1,36 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Administration" repository permissions (read)
 # L3.6 (Treatment of defects with severity middle)
 # Description: Vulnerabilities with severity middle are added to the quality gate.
 # Rule: Vulnerabilities with severity middle are added to the quality gate.
 # Ideas: Check if dependabot alerts for medium vulnerabilities are added to the quality gate
+INVALIDATED_BY = ['settings']
+TTL = 24 * 60 * 60
+
 def check_l3_6_treatment_of_defects_middle(repo):
     try:
         vulnerability_check_keyword = "medium-vulnerability"
         branch = "main"
 
-        result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/rules/branches/{branch}'],
-            capture_output=True, text=True, check=True
-        )
+        result = gh_api(f'/repos/{repo}/rules/branches/{branch}', check=True)
 
-        rulesets = json.loads(result.stdout)
+        rulesets = result.json()
        
         for ruleset in rulesets:
             if ruleset['type'] == 'required_status_checks':
                 for check in ruleset['parameters']['required_status_checks']:
                     if vulnerability_check_keyword in check['context']:
-                        return f"Ruleset '{ruleset['ruleset_id']}' applies to '{branch}' and includes a required status check for medium vulnerabilities"
+                        return passed(f"Ruleset '{ruleset['ruleset_id']}' applies to '{branch}' and includes a required status check for medium vulnerabilities")
                             
-        return  "No ruleset with required status checks for medium vulnerabilities found for branch main"
+        return failed("No ruleset with required status checks for medium vulnerabilities found for branch main")
           
-    except subprocess.CalledProcessError as e:
-        return "Unable to check"
+    except GitHubAPIError as e:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error"
+        return error("Error")
     except Exception as e:
-        return "Error exception"
+        return error()
     
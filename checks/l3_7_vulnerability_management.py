@@ -1,47 +1,39 @@
-import subprocess
 import json
+from utils.github_api import GitHubAPIError
+from utils.org_alerts import alerts_readable
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Security alerts" repository permissions (read)
 # Rule: Usage of a vulnerability management system
 # Ideas: Check for enabled Dependabot alerts, code scanning alerts, and secret scanning alerts
 #        Could be extended to check for third-party vulnerability management integrations
 
+INVALIDATED_BY = ['settings']
+TTL = 24 * 60 * 60
+
 def check_l3_7_vulnerability_management(repo):
     try:
-        # Check for Dependabot alerts
-        dependabot_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/dependabot/alerts?state=open&per_page=1'],
-            capture_output=True, text=True
-        )
-        
-        # Check for code scanning alerts
-        code_scanning_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/code-scanning/alerts?state=open&per_page=1'],
-            capture_output=True, text=True
-        )
-        
-        # Check for secret scanning alerts
-        secret_scanning_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/secret-scanning/alerts?state=open&per_page=1'],
-            capture_output=True, text=True
-        )
-        
         systems = []
-        if dependabot_result.returncode == 0:
+        # Settled from the org alert listings and the repo's security settings where possible
+        # (utils/org_alerts.py), probing the per-repo alert endpoints otherwise
+        # Check for Dependabot alerts
+        if alerts_readable(repo, 'dependabot_alerts', f'/repos/{repo}/dependabot/alerts?state=open&per_page=1'):
             systems.append("Dependabot")
-        if code_scanning_result.returncode == 0:
+        # Check for code scanning alerts
+        if alerts_readable(repo, 'code_scanning_alerts', f'/repos/{repo}/code-scanning/alerts?state=open&per_page=1'):
             systems.append("Code scanning")
-        if secret_scanning_result.returncode == 0:
+        # Check for secret scanning alerts
+        if alerts_readable(repo, 'secret_scanning_alerts', f'/repos/{repo}/secret-scanning/alerts?state=open&per_page=1'):
             systems.append("Secret scanning")
         
         if systems:
-            return f"Detected ({', '.join(systems)})"
+            return passed(f"Detected ({', '.join(systems)})", metric=len(systems), evidence=systems)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
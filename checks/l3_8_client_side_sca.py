@@ -1,11 +1,19 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.keyword_matcher import find_keywords, register_keywords
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" repository permissions (read)
 # Rule: Software Composition Analysis (client side)
 # Ideas: Check for client-side SCA tool configurations and related GitHub Actions workflows
 #        Could be extended to analyze specific tool outputs or integration methods
 
+# Keywords that might indicate client-side SCA workflows, matched against workflow names
+WORKFLOW_NAME_KEYWORDS = register_keywords('l3_8_client_side_sca', ['npm audit', 'yarn audit', 'bundle audit', 'safety check'])
+
+INVALIDATED_BY = ['push']
+
 def check_l3_8_client_side_sca(repo):
     try:
         sca_indicators = []
@@ -20,33 +28,26 @@ def check_l3_8_client_side_sca(repo):
         ]
 
         for file in config_files:
-            result = subprocess.run(
-                ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
+            if repo_file_exists(repo, file):
                 sca_indicators.append(f"Config file: {file}")
 
         # Check for GitHub Actions workflows related to client-side SCA
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
+        actions_result = gh_api(f'/repos/{repo}/actions/workflows')
 
-        if actions_result.returncode == 0:
-            workflows = json.loads(actions_result.stdout)
+        if actions_result.ok:
+            workflows = actions_result.json()
             for workflow in workflows['workflows']:
-                if any(keyword in workflow['name'].lower() for keyword in ['npm audit', 'yarn audit', 'bundle audit', 'safety check']):
+                if find_keywords(WORKFLOW_NAME_KEYWORDS, workflow['name']):
                     sca_indicators.append(f"GitHub Action: {workflow['name']}")
 
         if sca_indicators:
-            return f"Client-side SCA detected: {', '.join(sca_indicators)}"
+            return passed(f"Client-side SCA detected: {', '.join(sca_indicators)}", metric=len(sca_indicators), evidence=sca_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
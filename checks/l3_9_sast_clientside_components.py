@@ -1,11 +1,19 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.keyword_matcher import find_keywords, register_keywords
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" and "Actions" repository permissions (read)
 # Rule: Static analysis for important client-side components
 # Ideas: Check for client-side static analysis tool configurations and related GitHub Actions workflows
 #        Could be extended to analyze specific tool outputs or coverage of critical components
 
+# Keywords that might indicate client-side static analysis workflows, matched against workflow names
+WORKFLOW_NAME_KEYWORDS = register_keywords('l3_9_sast_clientside_components', ['eslint', 'stylelint', 'tslint', 'jshint', 'prettier', 'static analysis'])
+
+INVALIDATED_BY = ['push']
+
 def check_l3_9_sast_clientside_components(repo):
     try:
         analysis_indicators = []
@@ -21,34 +29,27 @@ def check_l3_9_sast_clientside_components(repo):
 
         for tool, files in config_files.items():
             for file in files:
-                result = subprocess.run(
-                    ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                    capture_output=True, text=True
-                )
-                if result.returncode == 0:
+                if repo_file_exists(repo, file):
                     analysis_indicators.append(f"{tool} config found: {file}")
                     break  # Found a config file for this tool, move to next
 
         # Check for GitHub Actions workflows related to client-side static analysis
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
+        actions_result = gh_api(f'/repos/{repo}/actions/workflows')
 
-        if actions_result.returncode == 0:
-            workflows = json.loads(actions_result.stdout)
+        if actions_result.ok:
+            workflows = actions_result.json()
             for workflow in workflows['workflows']:
-                if any(keyword in workflow['name'].lower() for keyword in ['eslint', 'stylelint', 'tslint', 'jshint', 'prettier', 'static analysis']):
+                if find_keywords(WORKFLOW_NAME_KEYWORDS, workflow['name']):
                     analysis_indicators.append(f"GitHub Action: {workflow['name']}")
 
         if analysis_indicators:
-            return f"Client-side static analysis detected: {', '.join(analysis_indicators)}"
+            return passed(f"Client-side static analysis detected: {', '.join(analysis_indicators)}", metric=len(analysis_indicators), evidence=analysis_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
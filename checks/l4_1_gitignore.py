@@ -1,44 +1,54 @@
-import subprocess
 import base64
+import json
+from utils.blob_cache import cached_blob_artifact
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import fetch_blob_text, repo_file_sha
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" repository permissions (read)
 # Rule: L4.1 (.gitignore): Check for the presence and content of a .gitignore file
 # Ideas: Check if .gitignore exists and count the number of active rules
 #        Could be extended to analyze specific rules or patterns in the .gitignore file
 
+INVALIDATED_BY = ['push']
+
+def count_gitignore_rules(decoded_content):
+    # Split the content into lines and filter out empty lines and comments
+    lines = decoded_content.split('\n')
+    non_empty_lines = [line for line in lines if line.strip() and not line.startswith('#')]
+    return len(non_empty_lines)
+
 def check_l4_1_gitignore(repo):
     try:
-        # Use GitHub CLI to check if .gitignore exists in the repository
-        result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/contents/.gitignore'],
-            capture_output=True, text=True
-        )
-        if result.returncode == 0:
-            gitignore_content = result.stdout
-            
-            # Use jq to extract the content field from the JSON response
-            content_json = subprocess.run(
-                ['jq', '-r', '.content'],
-                input=gitignore_content,
-                capture_output=True,
-                text=True
-            ).stdout.strip()
+        # The rule count of a known .gitignore blob is cached by its sha, across repos and runs
+        sha = repo_file_sha(repo, '.gitignore')
+        if sha:
+            def load_rule_count():
+                decoded_content = fetch_blob_text(repo, sha)
+                return count_gitignore_rules(decoded_content) if decoded_content else None
+            rule_count = cached_blob_artifact(sha, 'gitignore_rules', load_rule_count)
+            return passed(f"Detected ({rule_count} rules)", metric=rule_count) if rule_count is not None else failed()
+
+        # Use the GitHub API to check if .gitignore exists in the repository
+        result = gh_api(f'/repos/{repo}/contents/.gitignore')
+        if result.ok:
+            # Extract the base64 encoded content field from the JSON response
+            content_json = (result.json().get('content') or '').strip()
             
             if content_json:
                 # Decode the base64 encoded content of the .gitignore file
                 decoded_content = base64.b64decode(content_json).decode('utf-8')
                 
-                # Split the content into lines and filter out empty lines and comments
-                lines = decoded_content.split('\n')
-                non_empty_lines = [line for line in lines if line.strip() and not line.startswith('#')]
-                
-                return f"Detected ({len(non_empty_lines)} rules)"
+                rule_count = count_gitignore_rules(decoded_content)
+                return passed(f"Detected ({rule_count} rules)", metric=rule_count)
             else:
-                return "Not detected"
+                return failed()
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
+    except json.JSONDecodeError:
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,11 +1,19 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.keyword_matcher import find_keywords, register_keywords
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" and "Actions" repository permissions (read)
 # Rule: L4.2 (Advanced visualization of defects): Check for implementation of advanced defect visualization
 # Ideas: Check for visualization-related files, tool integrations, and GitHub Actions workflows
 #        Could be extended to analyze specific visualization configurations or outputs
 
+# Keywords that might indicate defect visualization workflows, matched against workflow names
+WORKFLOW_NAME_KEYWORDS = register_keywords('l4_2_advanced_defect_visualization', ['visualiz', 'diagram', 'defect'])
+
+INVALIDATED_BY = ['push']
+
 def check_l4_2_advanced_defect_visualization(repo):
     try:
         visualization_indicators = []
@@ -17,47 +25,36 @@ def check_l4_2_advanced_defect_visualization(repo):
             'create-diagram.yml',
             'defect-visualization-config.json'
         ]
-        # Use GitHub CLI to check for the existence of each visualization-related file
+        # Use the GitHub API to check for the existence of each visualization-related file
         for file in viz_files:
-            result = subprocess.run(
-                ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
+            if repo_file_exists(repo, file):
                 visualization_indicators.append(f"Visualization file found: {file}")
 
         # Check for integration with visualization tools
         integrations_to_check = ['veracode', 'snyk']
-        # Use GitHub CLI to check for configuration files of specific visualization tools
+        # Use the GitHub API to check for configuration files of specific visualization tools
         for integration in integrations_to_check:
-            result = subprocess.run(
-                ['gh', 'api', f'/repos/{repo}/contents/.{integration}'],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
+            if repo_file_exists(repo, f'.{integration}'):
                 visualization_indicators.append(f"Integration found: {integration}")
 
         # Check for GitHub Actions related to visualization
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
-        if actions_result.returncode == 0:
+        actions_result = gh_api(f'/repos/{repo}/actions/workflows')
+        if actions_result.ok:
             # Parse the JSON output of workflows
-            workflows = json.loads(actions_result.stdout)
+            workflows = actions_result.json()
             # Check for workflows with visualization-related keywords in their names
             for workflow in workflows['workflows']:
-                if any(keyword in workflow['name'].lower() for keyword in ['visualiz', 'diagram', 'defect']):
+                if find_keywords(WORKFLOW_NAME_KEYWORDS, workflow['name']):
                     visualization_indicators.append(f"Visualization workflow: {workflow['name']}")
 
         if visualization_indicators:
-            return f"Advanced defect visualization detected: {', '.join(visualization_indicators)}"
+            return passed(f"Advanced defect visualization detected: {', '.join(visualization_indicators)}", metric=len(visualization_indicators), evidence=visualization_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,45 +1,44 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_facts import repo_fact
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Issues" and "Contents" repository permissions (read)
 # Rule: L4.3 (Reproducible defect tickets): Check for implementation of reproducible defect reporting
 # Ideas: Check for bug report templates, reproducibility labels, and issues with reproduction steps
 #        Could be extended to analyze the quality of reproduction steps or automation of reproduction
 
+INVALIDATED_BY = ['push', 'activity']
+TTL = 24 * 60 * 60
+
 def check_l4_3_reproducible_defects(repo):
     try:
         indicators = []
 
         # Check for issue templates, particularly bug report templates
-        templates_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/contents/.github/ISSUE_TEMPLATE'],
-            capture_output=True, text=True
-        )
-        if templates_result.returncode == 0:
-            templates = json.loads(templates_result.stdout)
-            for template in templates:
-                if 'bug' in template['name'].lower() or 'defect' in template['name'].lower():
-                    indicators.append("Bug report template found")
-                    break
+        # (template file names and labels are prefetched by the GraphQL batch backend when enabled)
+        template_names = repo_fact(repo, 'issue_template_files')
+        if template_names is None:
+            templates_result = gh_api(f'/repos/{repo}/contents/.github/ISSUE_TEMPLATE')
+            template_names = [template['name'] for template in templates_result.json()] if templates_result.ok else []
+        for name in template_names:
+            if 'bug' in name.lower() or 'defect' in name.lower():
+                indicators.append("Bug report template found")
+                break
 
         # Check for labels related to reproducibility
-        labels_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/labels'],
-            capture_output=True, text=True
-        )
-        if labels_result.returncode == 0:
-            labels = json.loads(labels_result.stdout)
-            reproducible_labels = [label for label in labels if 'reproducible' in label['name'].lower()]
-            if reproducible_labels:
-                indicators.append(f"Reproducibility labels found: {', '.join([l['name'] for l in reproducible_labels])}")
+        reproducible_labels = repo_fact(repo, 'reproducible_labels')
+        if reproducible_labels is None:
+            labels_result = gh_api(f'/repos/{repo}/labels')
+            labels = labels_result.json() if labels_result.ok else []
+            reproducible_labels = [label['name'] for label in labels if 'reproducible' in label['name'].lower()]
+        if reproducible_labels:
+            indicators.append(f"Reproducibility labels found: {', '.join(reproducible_labels)}")
 
         # Check for issues with reproducibility information in their body
-        issues_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/issues?state=all&per_page=100'],
-            capture_output=True, text=True
-        )
-        if issues_result.returncode == 0:
-            issues = json.loads(issues_result.stdout)
+        issues_result = gh_api(f'/repos/{repo}/issues?state=all&per_page=100')
+        if issues_result.ok:
+            issues = issues_result.json()
             reproducible_issues = [
                 issue for issue in issues 
                 if issue.get('body') and ('steps to reproduce' in issue['body'].lower() or 'reproduction steps' in issue['body'].lower())
@@ -48,13 +47,13 @@ def check_l4_3_reproducible_defects(repo):
                 indicators.append(f"Found {len(reproducible_issues)} issues with reproduction steps")
 
         if indicators:
-            return f"Reproducible defect tickets likely configured: {', '.join(indicators)}"
+            return passed(f"Reproducible defect tickets likely configured: {', '.join(indicators)}", metric=len(indicators), evidence=indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
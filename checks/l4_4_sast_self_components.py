@@ -1,11 +1,19 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.keyword_matcher import find_keywords, register_keywords
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" and "Actions" repository permissions (read)
 # Rule: L4.4 (Static analysis for all self-written components): Check for implementation of static analysis tools
 # Ideas: Check for configuration files of common static analysis tools and related GitHub Actions workflows
 #        Could be extended to analyze specific tool configurations or coverage of different languages/components
 
+# Keywords that might indicate static analysis workflows, matched against workflow names
+WORKFLOW_NAME_KEYWORDS = register_keywords('l4_4_sast_self_components', ['lint', 'analyze', 'sonar', 'static analysis'])
+
+INVALIDATED_BY = ['push']
+
 def check_l4_4_sast_self_components(repo):
     try:
         static_analysis_indicators = []
@@ -16,37 +24,30 @@ def check_l4_4_sast_self_components(repo):
             '.rubocop.yml', 'stylelint.config.js', '.ktlint.yml', '.swiftlint.yml'
         ]
 
-        # Use GitHub CLI to check for the existence of each config file
+        # Use the GitHub API to check for the existence of each config file
         for file in config_files:
-            result = subprocess.run(
-                ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
+            if repo_file_exists(repo, file):
                 static_analysis_indicators.append(f"Config file: {file}")
 
         # Check for GitHub Actions workflows related to static analysis
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
+        actions_result = gh_api(f'/repos/{repo}/actions/workflows')
 
-        if actions_result.returncode == 0:
+        if actions_result.ok:
             # Parse the JSON output of workflows
-            workflows = json.loads(actions_result.stdout)
+            workflows = actions_result.json()
             # Check for workflows with static analysis-related keywords in their names
             for workflow in workflows['workflows']:
-                if any(keyword in workflow['name'].lower() for keyword in ['lint', 'analyze', 'sonar', 'static analysis']):
+                if find_keywords(WORKFLOW_NAME_KEYWORDS, workflow['name']):
                     static_analysis_indicators.append(f"GitHub Action: {workflow['name']}")
 
         if static_analysis_indicators:
-            return f"Static analysis configured: {', '.join(static_analysis_indicators)}"
+            return passed(f"Static analysis configured: {', '.join(static_analysis_indicators)}", metric=len(static_analysis_indicators), evidence=static_analysis_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,23 +1,28 @@
-import subprocess
 import json
-import base64
+from utils.github_api import GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.repo_metadata import get_repo_metadata
+from utils.keyword_matcher import register_keywords
+from utils.workflows import get_workflows
+from utils.check_result import error, failed, passed, unable_to_check
 
 # Required Github permissions: "Contents" and "Actions" repository permissions (read)
 # Rule: L4.7 (Test for known vulnerabilities): Check for implementation of vulnerability testing
 # Ideas: Check for GitHub Advanced Security, vulnerability scanning tool configurations, and related GitHub Actions workflows
 #        Could be extended to analyze specific tool configurations or vulnerability testing methods
 
+# Keywords related to vulnerability scanning in workflow content
+WORKFLOW_KEYWORDS = register_keywords('l4_7_test_known_cves', ['codeql', 'vulnerability', 'security scan', 'snyk', 'dependabot'])
+
+INVALIDATED_BY = ['push', 'settings']
+
 def check_l4_7_test_known_cves(repo):
     try:
         vulnerability_indicators = []
 
         # Check if GitHub Advanced Security is enabled for the repository
-        repo_info = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}'],
-            capture_output=True, text=True
-        )
-        if repo_info.returncode == 0:
-            repo_data = json.loads(repo_info.stdout)
+        repo_data = get_repo_metadata(repo)
+        if repo_data is not None:
             if repo_data.get('security_and_analysis', {}).get('advanced_security', {}).get('status') == 'enabled':
                 vulnerability_indicators.append("GitHub Advanced Security enabled")
 
@@ -32,43 +37,27 @@ def check_l4_7_test_known_cves(repo):
         # Check for the presence of configuration files for each tool
         for tool, config_files in tool_configs.items():
             for file in config_files:
-                result = subprocess.run(
-                    ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                    capture_output=True, text=True
-                )
-                if result.returncode == 0:
+                if repo_file_exists(repo, file):
                     vulnerability_indicators.append(f"{tool} config found: {file}")
 
         # Check for GitHub Actions workflows related to vulnerability scanning
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
+        workflows = get_workflows(repo)
 
-        if actions_result.returncode == 0:
-            workflows = json.loads(actions_result.stdout)
-            for workflow in workflows.get('workflows', []):
-                # Fetch and decode the content of each workflow
-                workflow_content = subprocess.run(
-                    ['gh', 'api', workflow['url']],
-                    capture_output=True, text=True
-                )
-                if workflow_content.returncode == 0 and 'content' in json.loads(workflow_content.stdout):
-                    workflow_data = json.loads(workflow_content.stdout)
-                    content = workflow_data['content']
-                    decoded_content = base64.b64decode(content).decode('utf-8').lower()
-                    # Check for keywords related to vulnerability scanning in workflow content
-                    if any(keyword in decoded_content for keyword in ['codeql', 'vulnerability', 'security scan', 'snyk', 'dependabot']):
-                        vulnerability_indicators.append(f"Vulnerability scanning workflow: {workflow['name']}")
+        if workflows is not None:
+            # Workflow file contents, fetched and decoded once per repo
+            for workflow in workflows:
+                # Check for keywords related to vulnerability scanning in workflow content
+                if workflow.keywords(WORKFLOW_KEYWORDS):
+                    vulnerability_indicators.append(f"Vulnerability scanning workflow: {workflow.name}")
 
         if vulnerability_indicators:
-            return f"Vulnerability testing config: {'; '.join(vulnerability_indicators)}"
+            return passed(f"Vulnerability testing config: {'; '.join(vulnerability_indicators)}", metric=len(vulnerability_indicators), evidence=vulnerability_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,21 +1,22 @@
-import subprocess
 import json
+from utils.github_api import gh_api, GitHubAPIError
+from utils.check_result import error, failed, passed, unable_to_check
+
+INVALIDATED_BY = ['push']
+TTL = 24 * 60 * 60
 
 def check_l5_1_artifact_sigining(repo):
     try:
-        result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/artifacts'],
-            capture_output=True, text=True, check=True
-        )
-        artifacts = json.loads(result.stdout)
+        result = gh_api(f'/repos/{repo}/actions/artifacts', check=True)
+        artifacts = result.json()
         signed_artifacts = [a for a in artifacts['artifacts'] if 'signature' in a.get('name', '').lower()]
         if signed_artifacts:
-            return f"Detected ({len(signed_artifacts)})"
-        return "Not detected"
+            return passed(f"Detected ({len(signed_artifacts)})", metric=len(signed_artifacts))
+        return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,40 +1,38 @@
-import subprocess
 import json
-from datetime import datetime, timedelta
+from utils.github_api import gh_api, GitHubAPIError
+from utils.pull_requests import get_pull_requests
+from utils.check_result import error, failed, passed, unable_to_check
+
+INVALIDATED_BY = ['activity']
 
 def check_l5_2_treatment_of_defects_all(repo):
     try:
         defect_indicators = []
 
         # Check for issues labeled as defects
-        issues_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/issues?state=all&labels=bug,defect&per_page=100'],
-            capture_output=True, text=True
-        )
-        if issues_result.returncode == 0:
-            issues = json.loads(issues_result.stdout)
+        issues_result = gh_api(f'/repos/{repo}/issues?state=all&labels=bug,defect&per_page=100')
+        if issues_result.ok:
+            issues = issues_result.json()
             if issues:
                 defect_indicators.append(f"Found {len(issues)} issues labeled as bugs/defects")
 
         # Check for pull requests mentioning defect fixes
-        prs_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/pulls?state=all&per_page=100'],
-            capture_output=True, text=True
-        )
-        if prs_result.returncode == 0:
-            prs = json.loads(prs_result.stdout)
+        pull_requests = get_pull_requests(repo)
+        if pull_requests is not None:
+            # The latest 100 PRs of the shared pull request dataset
+            prs = pull_requests.latest()
             defect_prs = [pr for pr in prs if 'fix' in pr['title'].lower() or 'bug' in pr['title'].lower()]
             if defect_prs:
                 defect_indicators.append(f"Found {len(defect_prs)} PRs related to defect fixes")
 
         if defect_indicators:
-            return f"Defect treatment detected: {', '.join(defect_indicators)}"
+            return passed(f"Defect treatment detected: {', '.join(defect_indicators)}", metric=len(defect_indicators), evidence=defect_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
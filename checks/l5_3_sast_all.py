@@ -1,6 +1,14 @@
-import subprocess
 import json
 import base64
+from utils.github_api import gh_api, GitHubAPIError
+from utils.repo_files import repo_file_exists
+from utils.keyword_matcher import find_keywords, register_keywords
+from utils.check_result import error, failed, passed, unable_to_check
+
+# Keywords that might indicate static analysis workflows, matched against workflow names
+WORKFLOW_NAME_KEYWORDS = register_keywords('l5_3_sast_all', ['lint', 'analyze', 'sonar', 'static analysis'])
+
+INVALIDATED_BY = ['push']
 
 def check_l5_3_sast_all(repo):
     try:
@@ -13,33 +21,26 @@ def check_l5_3_sast_all(repo):
         ]
 
         for file in config_files:
-            result = subprocess.run(
-                ['gh', 'api', f'/repos/{repo}/contents/{file}'],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
+            if repo_file_exists(repo, file):
                 static_analysis_indicators.append(f"Config file: {file}")
 
         # Look GitHub Actions workflows for static analysis
-        actions_result = subprocess.run(
-            ['gh', 'api', f'/repos/{repo}/actions/workflows'],
-            capture_output=True, text=True
-        )
+        actions_result = gh_api(f'/repos/{repo}/actions/workflows')
 
-        if actions_result.returncode == 0:
-            workflows = json.loads(actions_result.stdout)
+        if actions_result.ok:
+            workflows = actions_result.json()
             for workflow in workflows['workflows']:
-                if any(keyword in workflow['name'].lower() for keyword in ['lint', 'analyze', 'sonar', 'static analysis']):
+                if find_keywords(WORKFLOW_NAME_KEYWORDS, workflow['name']):
                     static_analysis_indicators.append(f"GitHub Action: {workflow['name']}")
 
         if static_analysis_indicators:
-            return f"Static analysis configured: {', '.join(static_analysis_indicators)}"
+            return passed(f"Static analysis configured: {', '.join(static_analysis_indicators)}", metric=len(static_analysis_indicators), evidence=static_analysis_indicators)
         else:
-            return "Not detected"
+            return failed()
 
-    except subprocess.CalledProcessError:
-        return "Unable to check"
+    except GitHubAPIError:
+        return unable_to_check()
     except json.JSONDecodeError:
-        return "Error parsing data"
+        return error("Error parsing data")
     except Exception as e:
-        return "Error exception"
+        return error()
@@ -1,48 +1,94 @@
-import yaml
-import importlib
-import csv
+import json
 from tabulate import tabulate
 import os
+import sys
+import argparse
+import socket
+import time
+from utils.check_registry import CheckRegistry
+from utils.check_result import error, not_supported
+from utils.executor import DEFAULT_WORKERS, iter_repo_results
+from utils.blob_cache import configure_blob_cache
+from utils.state_store import DEFAULT_TTL, SIGNALS, IncrementalRunner, StateStore
+from utils.results_db import ResultsDB
+from utils.deadlines import configure_deadlines
+from utils.concurrency import DEFAULT_MAX_LIMIT, print_limiter_summary
+from utils.credentials import load_tokens, print_credential_usage
+from utils.github_api import DEFAULT_TIMEOUT, configure_cache, configure_requests, get_client
+from utils.graphql_batch import prefetch_repo_facts
+from utils.org_alerts import prefetch_org_alerts
+from utils.http_cache import default_cache_dir
+from utils.report_writer import StreamingReportWriter
+from utils.work_queue import WorkQueue
+from utils.scoring import StatusMatrix, build_scorecard, format_fraction, load_teams
+from utils.get_repos_from_file import get_repos_from_file
+from utils.get_repos_from_org import get_repos_from_orgs
 
-def load_check_levels(yaml_file):
-    with open(yaml_file, 'r') as f:
-        return yaml.safe_load(f)
+# Catalogue of checks, read from the YAML on first use
+CHECKS = CheckRegistry('dsomm_checks.yaml')
 
-CHECK_LEVELS = load_check_levels('dsomm_checks.yaml')
+def load_check(check_name):
+    return CHECKS.function(check_name)
 
-AVAILABLE_CHECKS = [check['name'] for level in CHECK_LEVELS.values() for check in level if check.get('supported', False)]
+def run_check(repo, check):
+    try:
+        check_function = load_check(check)
+        return check_function(repo)
+    except ValueError as e:
+        return not_supported(str(e))
+    except (ImportError, AttributeError) as e:
+        return error(str(e))
 
-def load_check(check_name):
-    for level_checks in CHECK_LEVELS.values():
-        for check in level_checks:
-            if check['name'] == check_name and check.get('supported', False):
-                module_name = check.get('module')
-                if not module_name:
-                    raise ValueError(f"Module name not found for supported check '{check_name}' in checks directory.")
-                try:
-                    module = importlib.import_module(f'checks.{module_name}')
-                    check_function = getattr(module, f'check_{module_name}')
-                    return check_function
-                except ImportError:
-                    raise ImportError(f"Error: Module 'checks.{module_name}' not found. Please ensure the file 'checks/{module_name}.py' exists.")
-                except AttributeError:
-                    raise AttributeError(f"Error: Function 'check_{module_name}' not found in module 'checks.{module_name}'. Please ensure the function is defined correctly.")
-    raise ValueError(f"Not Supported - Manual Process")
-
-def check_repo_security_features(repo, selected_checks):
-    results = {}
+def check_invalidation(check):
+    # (signals, ttl) of a supported check for incremental runs; checks that declare no
+    # INVALIDATED_BY are invalidated by every signal and expire after DEFAULT_TTL
+    try:
+        module = sys.modules[load_check(check).__module__]
+    except (ImportError, AttributeError, ValueError):
+        return None
+    if not hasattr(module, 'INVALIDATED_BY'):
+        return SIGNALS, DEFAULT_TTL
+    return module.INVALIDATED_BY, getattr(module, 'TTL', None)
+
+def record_results(repo_results, selected_checks, history):
+    # Appends each repo's results to the history database as it passes through
+    run_id = history.start_run()
+    for repo, results in repo_results:
+        history.record_repo(run_id, repo, [
+            (check, get_check_level(check), results[check],
+             int(is_successful(results[check])) if is_supported_check(check) else None)
+            for check in selected_checks
+        ])
+        yield repo, results
+    history.finish_run(run_id)
+
+def evaluate_repos(repos, selected_checks, workers=None, per_repo_workers=None, state=None, history=None, matrix=None):
+    # Repos and their checks run concurrently; results are yielded in the order of `repos`.
+    # Checks of one repo share a request scope, so endpoints several checks need are fetched once
     for check in selected_checks:
+        # Import every check first, so all workflow keywords are registered before the first scan
         try:
-            check_function = load_check(check)
-            results[check] = check_function(repo)
-        except (ImportError, AttributeError, ValueError) as e:
-            results[check] = str(e)
-    return results
+            load_check(check)
+        except (ImportError, AttributeError, ValueError):
+            pass
+    # With a state store, only check x repo cells whose signals changed are evaluated again
+    check_runner = run_check if state is None else IncrementalRunner(state, run_check, check_invalidation)
+    repo_results = iter_repo_results(repos, selected_checks, check_runner, workers, per_repo_workers)
+    return collect_results(repo_results, selected_checks, history, matrix)
+
+def collect_results(repo_results, selected_checks, history=None, matrix=None):
+    if matrix is not None:
+        # Status codes are kept for the scorecard while the results stream on
+        repo_results = matrix.collect(repo_results)
+    return repo_results if history is None else record_results(repo_results, selected_checks, history)
+
+def check_repo_security_features(repo, selected_checks, max_workers=None):
+    return dict(evaluate_repos([repo], selected_checks, workers=max_workers, per_repo_workers=max_workers))[repo]
 
 def print_check_menu(show_all=False):
     print("Available checks:")
     check_number = 1
-    for level, checks in CHECK_LEVELS.items():
+    for level, checks in CHECKS.levels().items():
         print(f"\n{level}:")
         for check in checks:
             supported = check.get('supported', False)
@@ -53,89 +99,386 @@ def print_check_menu(show_all=False):
 def get_selected_checks(user_input, show_all=False):
     selected_checks = []
     
+    check_levels = CHECKS.levels()
+    all_checks = [check['name'] for level in check_levels.values() for check in level]
     if user_input.strip().upper() == "ALL":
-        return [check['name'] for level in CHECK_LEVELS.values() for check in level]
+        return all_checks
 
-    all_checks = [check['name'] for level in CHECK_LEVELS.values() for check in level]
-    displayed_checks = all_checks if show_all else AVAILABLE_CHECKS
+    displayed_checks = all_checks if show_all else CHECKS.supported_names()
 
     for item in user_input.split(','):
         item = item.strip().upper()
-        if item in CHECK_LEVELS:
-            selected_checks.extend([check['name'] for check in CHECK_LEVELS[item]])
+        if item in check_levels:
+            selected_checks.extend([check['name'] for check in check_levels[item]])
         elif item.isdigit():
             index = int(item) - 1
             if 0 <= index < len(displayed_checks):
                 selected_checks.append(displayed_checks[index])
     
-    return list(set(selected_checks))
+    # Keep catalogue order so rows and columns come out the same on every run
+    selected = set(selected_checks)
+    return [check for check in all_checks if check in selected]
 
 def get_check_level(check):
-    for level, checks in CHECK_LEVELS.items():
-        if any(c['name'] == check for c in checks):
-            return level
-    return "Unknown"
+    return CHECKS.level(check)
 
-def output_results(all_results, repos, selected_checks, output_format, output_path=None, show_all=True):
-    headers = ["Security Feature"] + repos
-    table_data = []
-    level_stats = {level: {repo: {'total': 0, 'successful': 0} for repo in repos} for level in CHECK_LEVELS}
-    total_stats = {repo: {'total': 0, 'successful': 0} for repo in repos}
+def is_supported_check(feature):
+    return CHECKS.is_supported(feature)
 
+def is_successful(result):
+    return result.passed
+
+def score_repo(results, selected_checks):
+    level_stats = {}
+    total_stats = {'total': 0, 'successful': 0}
     for feature in selected_checks:
-        if not show_all and not any(check['name'] == feature and check.get('supported', False) for checks in CHECK_LEVELS.values() for check in checks):
-            continue # skip unsupported checks when show_all false
-        level = get_check_level(feature)
-        row = [feature]
-        for repo in repos:
-            result = all_results[repo.strip()][feature]
-            row.append(result)
-            if any(check['name'] == feature and check.get('supported', False) for checks in CHECK_LEVELS.values() for check in checks):
-                level_stats[level][repo]['total'] += 1
-                total_stats[repo]['total'] += 1
-                if result.lower() not in ['not detected', 'no', 'not available', 'not enabled', 'unable to check', 'error parsing data', 'error exception', 'error']:
-                    level_stats[level][repo]['successful'] += 1
-                    total_stats[repo]['successful'] += 1
-        table_data.append(row)
-
-    # Add level score rows
-    for level, repo_stats in level_stats.items():
-        if any(stats['total'] > 0 for stats in repo_stats.values()):
-            score_row = [f"{level} Score"]
-            for repo in repos:
-                stats = repo_stats[repo]
-                if stats['total'] > 0:
-                    score_row.append(f"{stats['successful']}/{stats['total']}")
-                else:
-                    score_row.append("")
-            table_data.append(score_row)
-
-    # Add Total Score row
-    total_score_row = ["Total Score"]
-    for repo in repos:
-        stats = total_stats[repo]
-        if stats['total'] > 0:
-            total_score_row.append(f"{stats['successful']}/{stats['total']}")
-        else:
-            total_score_row.append("")
-    table_data.append(total_score_row)
+        if not CHECKS.is_supported(feature):
+            continue
+        stats = level_stats.setdefault(CHECKS.level(feature), {'total': 0, 'successful': 0})
+        stats['total'] += 1
+        total_stats['total'] += 1
+        if results[feature].passed:
+            stats['successful'] += 1
+            total_stats['successful'] += 1
+    return level_stats, total_stats
 
-    if output_format.lower() == 'csv':
-        if output_path:
+def csv_output_path(output_path):
+    if output_path:
+        if os.path.dirname(output_path):
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            csv_filename = output_path
-        else:
-            csv_filename = 'dsomm.csv'
-        
+        return output_path
+    return 'dsomm.csv'
+
+def output_results(all_results, repos, selected_checks, output_format, output_path=None, show_all=True):
+    if output_format.lower() == 'csv':
+        csv_filename = csv_output_path(output_path)
         with open(csv_filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(headers)
-            writer.writerows(table_data)
+            write_report(((repo, all_results[repo]) for repo in repos), selected_checks, 'csv', csvfile, show_all)
         print(f"Results have been saved to {csv_filename}")
-    else:  # Default to tabular format
-        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        return
+
+    # Wide grid with one column per repo, meant for a handful of repos on a terminal
+    headers = ["Security Feature"] + repos
+    table_data = [[feature] + [str(all_results[repo.strip()][feature]) for repo in repos]
+                  for feature in selected_checks if show_all or is_supported_check(feature)]
+
+    # Add level score rows and the Total Score row
+    matrix = StatusMatrix(CHECKS.levels(), selected_checks)
+    for repo in repos:
+        matrix.add(repo, all_results[repo.strip()])
+    level_scores, level_totals = matrix.level_scores()
+    for i, level in enumerate(matrix.levels):
+        table_data.append([f"{level} Score"] + [format_fraction(score, level_totals[i]) for score in level_scores[:, i]])
+    total_scores, total = matrix.total_scores()
+    table_data.append(["Total Score"] + [format_fraction(score, total) for score in total_scores])
+
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Assess GitHub repositories against OWASP DSOMM checks. "
+                    "Without check or repository options the checks are selected interactively.")
+    selection = parser.add_argument_group("check selection")
+    selection.add_argument('--all', action='store_true', help="Run all checks")
+    selection.add_argument('--levels', help="Comma-separated levels to run, e.g. LEVEL1,LEVEL2")
+    selection.add_argument('--checks', help="Comma-separated check names or module names, e.g. 'Versioning,l2_2_sbom'")
+    sources = parser.add_argument_group("repository sources")
+    sources.add_argument('--repos', help="Comma-separated repositories (format: github-org/repo)")
+    sources.add_argument('--repos-file', help="File with one repository per line")
+    sources.add_argument('--org', action='append', help="Check every repository of an organization (repeatable)")
+    sources.add_argument('--stdin', action='store_true', help="Read repositories from standard input, one per line")
+    sources.add_argument('--include-archived', action='store_true', help="With --org, also check archived repositories")
+    sources.add_argument('--include-forks', action='store_true', help="With --org, also check forked repositories")
+    output = parser.add_argument_group("output")
+    output.add_argument('--format', choices=['tabular', 'csv', 'jsonl'], default='tabular',
+                        help="Output format; csv and jsonl write one row per repository as soon as it finishes (default: %(default)s)")
+    output.add_argument('--output', help="Output file for csv and jsonl (default: standard output)")
+    output.add_argument('--hide-unsupported', action='store_true', help="Leave \"Not Supported\" checks out of the output")
+    parser.add_argument('--workers', type=int, help="Checks in flight across all repositories")
+    parser.add_argument('--per-repo-workers', type=int, help="Checks in flight for a single repository")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Do not read or write the persistent HTTP response and blob caches")
+    parser.add_argument('--cache-dir', default=default_cache_dir(),
+                        help="Directory of the persistent caches (default: %(default)s)")
+    limits = parser.add_argument_group("time limits")
+    limits.add_argument('--request-timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help="Seconds a single API request may take (default: %(default)s)")
+    limits.add_argument('--check-timeout', type=float,
+                        help="Seconds a single check may take, rate limit pauses included; slower checks are reported as timed out")
+    limits.add_argument('--time-budget', type=float,
+                        help="Seconds the whole run may take; checks still running or not started by then are reported as timed out")
+    limits.add_argument('--no-hedge', action='store_true',
+                        help="Do not send a second copy of requests that are slower than the recent 95th percentile")
+    limits.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_LIMIT,
+                        help="Upper bound for the adaptive number of API requests in flight, which starts at --workers "
+                             "and grows while latency stays flat and GitHub does not throttle (default: %(default)s)")
+    limits.add_argument('--fixed-concurrency', action='store_true',
+                        help="Keep the number of requests in flight at --workers instead of adapting it")
+    parser.add_argument('--tokens-file',
+                        help="File with one GitHub token (or `label=token`) per line; requests are spread over these "
+                             "tokens and the ones in DSOMM_TOKENS by their remaining rate limit budget")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Reuse results of the last run for checks whose repository signals (push, settings, activity) are unchanged")
+    history = parser.add_argument_group("history")
+    history.add_argument('--history-db', help="SQLite database every run is recorded in (default: results.sqlite in the cache directory)")
+    history.add_argument('--no-history', action='store_true', help="Do not record this run in the history database")
+    history.add_argument('--query', choices=['trends', 'regressions', 'pass-rates'],
+                         help="Query the history database instead of running checks: level score trends, "
+                              "checks that regressed since the previous run, or pass rates per check in the latest run")
+    history.add_argument('--query-org', help="Limit --query to the repositories of one organization")
+    history.add_argument('--limit', type=int, default=30, help="Number of runs shown by --query trends (default: %(default)s)")
+    output.add_argument('--scorecard', help="Also write a JSON scorecard (score percentiles, pass rate per check, "
+                                            "rollups per owner and team) to this file")
+    output.add_argument('--teams', help="YAML file mapping team names to their repositories, for the --scorecard team rollup")
+    distributed = parser.add_argument_group("distributed runs",
+                                            "Spread one assessment over several worker processes sharing a queue file")
+    distributed.add_argument('--queue', help="SQLite work queue file")
+    queue_mode = distributed.add_mutually_exclusive_group()
+    queue_mode.add_argument('--enqueue', action='store_true',
+                            help="Queue the selected checks for the selected repositories, replacing the queue's contents")
+    queue_mode.add_argument('--work', action='store_true',
+                            help="Evaluate queued work until none is left, starting with this worker's shard")
+    queue_mode.add_argument('--merge', action='store_true',
+                            help="Write the results of a finished queue in the selected output format")
+    distributed.add_argument('--shards', type=int, default=1, help="With --enqueue, number of shards the repositories are split into (default: %(default)s)")
+    distributed.add_argument('--shard', type=int, default=0, help="With --work, the shard this worker starts with (default: %(default)s)")
+    parser.add_argument('--graphql', action='store_true',
+                        help="Prefetch repo-level facts for many repos per GraphQL query before running the checks")
+    return parser.parse_args(argv)
+
+def check_workers(args):
+    # With the adaptive limiter the limiter bounds the requests, so there are enough check threads
+    # for it to reach its maximum
+    if args.workers or args.fixed_concurrency:
+        return args.workers
+    return args.max_concurrency
+
+def report_request_stats():
+    client = get_client()
+    if client.limiter is not None:
+        print_limiter_summary(client.limiter)
+    print_credential_usage(client.credentials)
+
+def is_batch_mode(args):
+    return any([args.all, args.levels, args.checks, args.repos, args.repos_file, args.org, args.stdin])
+
+def resolve_checks(args):
+    if args.all:
+        return get_selected_checks("ALL", show_all=True)
+    selected = set()
+    if args.levels:
+        selected.update(get_selected_checks(args.levels, show_all=True))
+    for item in (args.checks or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        matches = [name for name in CHECKS.names() if item in (name, CHECKS.module_name(name))]
+        if not matches:
+            raise SystemExit(f"Unknown check: {item}")
+        selected.update(matches)
+    return [check for check in get_selected_checks("ALL", show_all=True) if check in selected]
+
+def resolve_repos(args):
+    repos = []
+    if args.repos:
+        repos.extend(args.repos.split(','))
+    if args.repos_file:
+        from_file = get_repos_from_file(args.repos_file)
+        if isinstance(from_file, str):
+            raise SystemExit(from_file)
+        repos.extend(from_file)
+    if args.org:
+        # Archived repos and forks are left out unless asked for
+        from_orgs = get_repos_from_orgs(args.org, args.include_archived, args.include_forks)
+        for org, from_org in from_orgs.items():
+            if isinstance(from_org, str):
+                raise SystemExit(f"{org}: {from_org}")
+            repos.extend(from_org)
+    if args.stdin:
+        repos.extend(sys.stdin)
+    # Drop blanks, comments and duplicates while keeping the given order
+    repos = [repo.strip() for repo in repos]
+    return list(dict.fromkeys(repo for repo in repos if repo and not repo.startswith('#')))
+
+def write_report(repo_results, selected_checks, output_format, out, show_all=True):
+    # Consumes (repo, results) pairs one at a time; only running score totals are kept
+    shown_checks = [check for check in selected_checks if show_all or is_supported_check(check)]
+    scored_levels = {get_check_level(check) for check in selected_checks if is_supported_check(check)}
+    levels = [level for level in CHECKS.levels() if level in scored_levels]
+    writer = StreamingReportWriter(out, output_format, shown_checks, levels)
+    for repo, results in repo_results:
+        level_stats, total_stats = score_repo(results, selected_checks)
+        writer.write(repo, results, level_stats, total_stats)
+    writer.close()
+
+def stream_results(repos, selected_checks, output_format, out, show_all=True, workers=None, per_repo_workers=None, state=None, history=None, matrix=None):
+    repo_results = evaluate_repos(repos, selected_checks, workers, per_repo_workers, state, history, matrix)
+    write_report(repo_results, selected_checks, output_format, out, show_all)
+
+def history_path(args):
+    return args.history_db or os.path.join(args.cache_dir, 'results.sqlite')
+
+def open_history(args):
+    return None if args.no_history else ResultsDB(history_path(args))
+
+def format_rate(successful, total):
+    return f"{successful}/{total} ({successful / total:.0%})" if total else ""
+
+def write_scorecard(matrix, path, teams_file=None):
+    teams = load_teams(teams_file) if teams_file else None
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(build_scorecard(matrix, teams), f, indent=2)
+    print(f"Scorecard has been saved to {path}", file=sys.stderr)
+
+def run_query(args):
+    history = ResultsDB(history_path(args))
+    prefix = f"{args.query_org}/" if args.query_org else None
+    if args.query == 'trends':
+        runs = {}
+        for run_id, started_at, level, successful, total in history.level_trends(args.limit, prefix):
+            row = runs.setdefault(run_id, {'Run': run_id, 'Started': time.strftime('%Y-%m-%d %H:%M', time.localtime(started_at))})
+            row[level] = format_rate(successful, total)
+        levels = [level for level in CHECKS.levels() if any(level in row for row in runs.values())]
+        headers = ['Run', 'Started'] + levels
+        table = [[row.get(header, "") for header in headers] for row in runs.values()]
+    elif args.query == 'regressions':
+        headers = ['Repository', 'Level', 'Check', 'Previous Result', 'Latest Result']
+        table = [[repo, level, check, before, now] for repo, check, level, before, now in history.regressions(prefix)]
+    else:
+        headers = ['Level', 'Check', 'Pass Rate']
+        table = [[level, check, format_rate(successful, total)] for level, check, successful, total in history.pass_rates(prefix)]
+    history.close()
+    print(tabulate(table, headers=headers, tablefmt="grid"))
+
+def run_batch(args):
+    selected_checks = resolve_checks(args)
+    if not selected_checks:
+        raise SystemExit("No valid checks selected.")
+    repos = resolve_repos(args)
+    if not repos:
+        raise SystemExit("No repositories to check.")
+    if args.graphql:
+        prefetch_repo_facts(repos)
+    if args.org:
+        # Org-wide alert listings replace most per-repo alert probes
+        prefetch_org_alerts(args.org)
+
+    state = StateStore(os.path.join(args.cache_dir, 'state.sqlite')) if args.incremental else None
+    history = open_history(args)
+    matrix = StatusMatrix(CHECKS.levels(), selected_checks) if args.scorecard else None
+
+    repo_results = evaluate_repos(repos, selected_checks, check_workers(args), args.per_repo_workers, state, history, matrix)
+    write_output(args, repo_results, repos, selected_checks)
+
+    if matrix is not None:
+        write_scorecard(matrix, args.scorecard, args.teams)
+
+    report_request_stats()
+    if state is not None:
+        print(f"Incremental run: {state.reused} results reused, {state.evaluated} evaluated", file=sys.stderr)
+        state.close()
+    if history is not None:
+        history.close()
+
+def write_output(args, repo_results, repos, selected_checks):
+    show_all = not args.hide_unsupported
+    if args.format == 'tabular':
+        output_results(dict(repo_results), repos, selected_checks, 'tabular', show_all=show_all)
+    elif args.output and args.output != '-':
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w', newline='') as out:
+            write_report(repo_results, selected_checks, args.format, out, show_all)
+    else:
+        write_report(repo_results, selected_checks, args.format, sys.stdout, show_all)
+
+def enqueue_work(args, queue):
+    selected_checks = resolve_checks(args)
+    if not selected_checks:
+        raise SystemExit("No valid checks selected.")
+    repos = resolve_repos(args)
+    if not repos:
+        raise SystemExit("No repositories to check.")
+    queue.create(repos, selected_checks, max(1, args.shards))
+    print(f"Queued {len(repos)} repositories x {len(selected_checks)} checks in {max(1, args.shards)} shards to {args.queue}",
+          file=sys.stderr)
+
+def run_worker(args, queue):
+    # Claims batches of repos until no shard has work left; results go back into the queue
+    selected_checks = queue.checks()
+    shard = args.shard % queue.shards()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    batch_size = check_workers(args) or DEFAULT_WORKERS
+    state = StateStore(os.path.join(args.cache_dir, 'state.sqlite')) if args.incremental else None
+    finished = stolen_repos = 0
+    while True:
+        repos, stolen = queue.claim(worker, shard, batch_size)
+        if not repos:
+            break
+        if stolen:
+            stolen_repos += len(repos)
+        if args.graphql:
+            prefetch_repo_facts(repos)
+        for repo, results in evaluate_repos(repos, selected_checks, check_workers(args), args.per_repo_workers, state):
+            queue.complete(worker, repo, results)
+            finished += 1
+    print(f"Worker {worker} (shard {shard}): {finished} repositories evaluated, {stolen_repos} of them stolen from other shards",
+          file=sys.stderr)
+    report_request_stats()
+    if state is not None:
+        state.close()
+
+def merge_work(args, queue):
+    progress = queue.progress()
+    if progress['pending'] or progress['running']:
+        raise SystemExit(f"{args.queue}: {progress['pending']} work items pending and {progress['running']} running; "
+                         "merge once the workers are done")
+    selected_checks = queue.checks()
+    repos = queue.repos()
+    history = open_history(args)
+    matrix = StatusMatrix(CHECKS.levels(), selected_checks) if args.scorecard else None
+    write_output(args, collect_results(queue.results(), selected_checks, history, matrix), repos, selected_checks)
+    if matrix is not None:
+        write_scorecard(matrix, args.scorecard, args.teams)
+    if history is not None:
+        history.close()
+
+def run_queue(args):
+    queue = WorkQueue(args.queue)
+    try:
+        if args.enqueue:
+            enqueue_work(args, queue)
+        elif args.work:
+            run_worker(args, queue)
+        elif args.merge:
+            merge_work(args, queue)
+        else:
+            raise SystemExit("--queue needs one of --enqueue, --work or --merge")
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finally:
+        queue.close()
 
 def main():
+    args = parse_args()
+    configure_cache(enabled=not args.no_cache, path=os.path.join(args.cache_dir, 'http_cache.sqlite'))
+    configure_blob_cache(enabled=not args.no_cache, path=os.path.join(args.cache_dir, 'blob_cache.sqlite'))
+    concurrency = None if args.fixed_concurrency else (args.workers or DEFAULT_WORKERS, args.max_concurrency)
+    configure_requests(timeout=args.request_timeout, hedging=not args.no_hedge, concurrency=concurrency,
+                       tokens=load_tokens(args.tokens_file) or None)
+    configure_deadlines(check_timeout=args.check_timeout, time_budget=args.time_budget)
+    if args.query:
+        run_query(args)
+        return
+    if args.queue:
+        run_queue(args)
+        return
+    if is_batch_mode(args):
+        run_batch(args)
+        return
+
     show_all_menu = input("Show all checks in menu (including not supported)?, default is N (y/N): ").strip().lower() == 'y'
     print_check_menu(show_all_menu)
     
@@ -156,9 +499,23 @@ def main():
     
     show_all_output = input("Show \"Not Supported\" checks in output? Default is Y (Y, n): ").strip().lower() != 'n'
     
+    repos = [repo.strip() for repo in repos]
+    if args.graphql:
+        prefetch_repo_facts(repos)
+    history = open_history(args)
+
+    if output_format.lower() == 'csv':
+        # Written repo by repo while the scan runs
+        csv_filename = csv_output_path(output_path)
+        with open(csv_filename, 'w', newline='') as csvfile:
+            stream_results(repos, selected_checks, 'csv', csvfile, show_all_output, check_workers(args), args.per_repo_workers,
+                           history=history)
+        print(f"Results have been saved to {csv_filename}")
+        return
+
     all_results = {}
-    for repo in repos:
-        all_results[repo.strip()] = check_repo_security_features(repo.strip(), selected_checks)
+    for repo, results in evaluate_repos(repos, selected_checks, check_workers(args), args.per_repo_workers, history=history):
+        all_results[repo] = results
 
     output_results(all_results, repos, selected_checks, output_format, output_path, show_all_output)
 
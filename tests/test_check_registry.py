@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from importlib.metadata import EntryPoint
+from unittest import mock
+
+from utils.check_registry import CheckRegistry
+from utils.check_result import Status
+from utils.executor import iter_repo_results
+
+# bool(repo) returns True rather than a CheckResult
+MISBEHAVING_PLUGIN = EntryPoint(name='LEVEL1/Misbehaving plugin', value='builtins:bool', group='dsomm.checks')
+
+
+class PluginResultTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.yaml_file = tempfile.mkstemp(suffix='.yaml')
+        with os.fdopen(handle, 'w') as f:
+            f.write('LEVEL1: []\n')
+        patcher = mock.patch('utils.check_registry.group_entry_points', lambda group: [MISBEHAVING_PLUGIN])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = CheckRegistry(self.yaml_file)
+
+    def tearDown(self):
+        os.remove(self.yaml_file)
+
+    def test_plugin_returning_a_bool_is_an_error(self):
+        result = self.registry.function('Misbehaving plugin')('o/r')
+        self.assertEqual(result.status, Status.ERROR)
+        self.assertEqual(result.text, "Plugin Misbehaving plugin returned bool")
+
+    def test_run_completes_with_misbehaving_checks(self):
+        def run_check(repo, check):
+            if check == 'Raw value':
+                return "Detected"
+            return self.registry.function(check)(repo)
+        [(_, results)] = list(iter_repo_results(['o/r'], ['Misbehaving plugin', 'Raw value'], run_check, workers=2))
+        self.assertEqual(results['Misbehaving plugin'].status, Status.ERROR)
+        self.assertEqual(results['Raw value'].status, Status.ERROR)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import github_api
+from utils.check_result import Status, failed, passed
+from utils.executor import iter_repo_results
+from utils.github_api import GitHubClient, gh_api
+from utils.rate_limit import RateLimitScheduler
+
+REQUEST_TIMEOUT = 0.5
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(REQUEST_TIMEOUT * 3)
+        data = json.dumps({'path': self.path}).encode()
+        try:
+            self.send_response(429 if self.path.startswith('/limited') else 200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def check_alerts(repo):
+    # Reads a missing answer as a clean negative, like the alert checks do
+    try:
+        response = gh_api(f'/slow/{repo}/alerts')
+        return passed("Enabled") if response.ok else failed("Not enabled")
+    except Exception:
+        return failed("Not enabled")
+
+
+def check_limited(repo):
+    return passed("Enabled") if gh_api(f'/limited/{repo}').ok else failed("Not enabled")
+
+
+def check_fast(repo):
+    return passed("Detected") if gh_api(f'/fast/{repo}').ok else failed()
+
+
+class RequestFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = GitHubClient(api_url=f'http://127.0.0.1:{self.server.server_address[1]}', token='', host='github.com',
+                                   timeout=REQUEST_TIMEOUT, hedging=False,
+                                   scheduler=RateLimitScheduler(max_retries=1, sleep=lambda seconds: None))
+        self.previous = github_api._client
+        github_api.set_client(self.client)
+
+    def tearDown(self):
+        github_api.set_client(self.previous)
+        self.client.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def run_checks(self, checks):
+        def run_check(repo, check):
+            return checks[check](repo)
+        [(_, results)] = list(iter_repo_results(['o/r'], list(checks), run_check, workers=4, per_repo_workers=4))
+        return results
+
+    def test_failed_check_with_request_timeout_is_timed_out(self):
+        results = self.run_checks({'alerts': check_alerts, 'fast': check_fast})
+        self.assertEqual(results['alerts'].status, Status.TIMED_OUT)
+        self.assertEqual(results['fast'].status, Status.PASSED)
+
+    def test_checks_sharing_a_timed_out_request_are_timed_out(self):
+        results = self.run_checks({'alerts': check_alerts, 'alerts again': check_alerts})
+        self.assertEqual(results['alerts'].status, Status.TIMED_OUT)
+        self.assertEqual(results['alerts again'].status, Status.TIMED_OUT)
+
+    def test_check_still_rate_limited_after_retries_is_unable_to_check(self):
+        results = self.run_checks({'limited': check_limited})
+        self.assertEqual(results['limited'].status, Status.UNABLE_TO_CHECK)
+        self.assertIn('rate limited', results['limited'].text)
+
+
+if __name__ == '__main__':
+    unittest.main()
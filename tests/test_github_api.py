@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from utils.concurrency import AIMDLimiter
+from utils import github_api
+from utils.github_api import MIN_HEDGE_DELAY, MIN_LATENCY_SAMPLES, APIResponse, GitHubClient, gh_api
+from utils.rate_limit import RateLimitScheduler
+from utils.request_cache import request_scope
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.client_address[1]))
+            first = self.path == '/slow' and not server.slowed
+            if first:
+                server.slowed = True
+        if first:
+            # Only the first copy is slow, so the hedge wins
+            time.sleep(MIN_HEDGE_DELAY + 1)
+        data = json.dumps({'path': self.path}).encode()
+        try:
+            self.send_response(429 if self.path == '/throttled' else 200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.slowed = False
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class HedgedRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.server = _Server()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = GitHubClient(api_url=f'http://127.0.0.1:{self.server.server_address[1]}', token='', host='github.com')
+        for _ in range(MIN_LATENCY_SAMPLES):
+            self.client.latency.record(0.01)
+
+    def tearDown(self):
+        self.client.pool.close()
+        self.client._hedge_pool.shutdown(wait=True)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_hedge_winner_connection_is_reusable(self):
+        response = self.client.request('GET', '/slow')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.client.latency.hedge_wins, 1)
+
+        # The winner's connection went back to the pool and must still work for the next request
+        response = self.client.request('GET', '/fast')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.json(), {'path': '/fast'})
+        hedge_port = self.server.requests[1][1]
+        self.assertEqual(self.server.requests[-1], ('/fast', hedge_port))
+
+
+class ThrottleSignalTest(unittest.TestCase):
+    def setUp(self):
+        self.server = _Server()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.limiter = AIMDLimiter(initial=8)
+        self.client = GitHubClient(api_url=f'http://127.0.0.1:{self.server.server_address[1]}', token='', host='github.com',
+                                   hedging=False, limiter=self.limiter,
+                                   scheduler=RateLimitScheduler(max_retries=0, sleep=lambda seconds: None))
+
+    def tearDown(self):
+        self.client.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_bare_429_cuts_the_limit(self):
+        response = self.client.request('GET', '/throttled')
+        self.assertEqual(response.status, 429)
+        self.assertEqual(self.limiter.limit, 4)
+
+
+def response(status, body=b'{}', headers=None):
+    return APIResponse(status, headers or {}, body, 'https://api.github.com/repos/o/r')
+
+
+class ScopedCacheTest(unittest.TestCase):
+    def test_definitive_responses(self):
+        self.assertTrue(response(200).definitive())
+        self.assertTrue(response(404).definitive())
+        self.assertTrue(response(403, b'{"message": "Resource not accessible by integration"}').definitive())
+        self.assertFalse(response(403, b'{"message": "You have exceeded a secondary rate limit"}').definitive())
+        self.assertFalse(response(403, headers={'x-ratelimit-remaining': '0'}).definitive())
+        self.assertFalse(response(429).definitive())
+        self.assertFalse(response(502).definitive())
+        self.assertFalse(response(0, b'timed out').definitive())
+
+    def test_transient_response_is_fetched_again(self):
+        answers = [response(502), response(200), response(500)]
+        previous = github_api._client
+        github_api.set_client(GitHubClient(api_url='http://127.0.0.1:9', token='', host='github.com', hedging=False))
+        try:
+            with mock.patch('utils.github_api._send', side_effect=lambda *args: answers.pop(0)), request_scope():
+                self.assertEqual(gh_api('/repos/o/r').status, 502)
+                self.assertEqual(gh_api('/repos/o/r').status, 200)
+                self.assertEqual(gh_api('/repos/o/r').status, 200)
+        finally:
+            github_api.set_client(previous)
+        self.assertEqual(len(answers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest import mock
+
+from utils.org_alerts import alerts_readable
+
+METADATA = {
+    'private': True,
+    'security_and_analysis': {
+        'advanced_security': {'status': 'disabled'},
+        'secret_scanning': {'status': 'enabled'},
+        'dependabot_security_updates': {'status': 'enabled'},
+    },
+}
+
+
+def probe(path):
+    raise AssertionError(f"unexpected probe of {path}")
+
+
+@mock.patch('utils.org_alerts.gh_api', probe)
+@mock.patch('utils.org_alerts.repo_fact', lambda repo, name: None)
+class AlertsReadableTest(unittest.TestCase):
+    @mock.patch('utils.org_alerts.get_repo_metadata', lambda repo: METADATA)
+    def test_security_settings_settle_clean_repos_without_probes(self):
+        self.assertTrue(alerts_readable('o/r', 'secret_scanning_alerts', '/repos/o/r/secret-scanning/alerts'))
+        self.assertTrue(alerts_readable('o/r', 'dependabot_alerts', '/repos/o/r/dependabot/alerts'))
+        self.assertFalse(alerts_readable('o/r', 'code_scanning_alerts', '/repos/o/r/code-scanning/alerts'))
+
+    @mock.patch('utils.org_alerts.get_repo_metadata', lambda repo: {'private': True})
+    def test_probes_without_security_settings(self):
+        with mock.patch('utils.org_alerts.gh_api') as gh_api:
+            gh_api.return_value.ok = False
+            self.assertFalse(alerts_readable('o/r', 'secret_scanning_alerts', '/repos/o/r/secret-scanning/alerts'))
+            gh_api.assert_called_once_with('/repos/o/r/secret-scanning/alerts')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from checks.l2_3_automated_pr_merges import check_l2_3_automated_pr_merges
+from utils.check_result import Status
+from utils.github_api import APIResponse
+from utils.pull_requests import load_merged_pull_requests
+
+
+def days_ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def response(data, status=200):
+    return APIResponse(status, {}, json.dumps(data).encode(), 'https://api.github.com/')
+
+
+CLOSED_PULLS = [
+    # Opened long before the window, merged by a bot inside it
+    {'number': 7, 'title': 'Bump lodash', 'state': 'closed', 'created_at': days_ago(90),
+     'updated_at': days_ago(2), 'merged_at': days_ago(2), 'user': {'type': 'Bot'}},
+    # Closed inside the window without being merged
+    {'number': 6, 'title': 'Drop', 'state': 'closed', 'created_at': days_ago(10),
+     'updated_at': days_ago(5), 'merged_at': None, 'user': {'type': 'User'}},
+    # Last touched before the window
+    {'number': 5, 'title': 'Old', 'state': 'closed', 'created_at': days_ago(80),
+     'updated_at': days_ago(60), 'merged_at': days_ago(60), 'user': {'type': 'User'}},
+]
+
+
+def fake_gh_api(path, *args, **kwargs):
+    if 'state=closed&sort=updated' in path:
+        return response(CLOSED_PULLS)
+    return response({'message': 'Not Found'}, 404)
+
+
+def fake_gh_graphql(query, variables=None):
+    return response({'data': {'repository': {'p7': {'mergedBy': {'__typename': 'Bot'}}}}})
+
+
+@mock.patch('utils.pull_requests.gh_graphql', fake_gh_graphql)
+@mock.patch('utils.pull_requests.gh_api', fake_gh_api)
+class MergedPullRequestsTest(unittest.TestCase):
+    def test_pr_created_before_window_and_merged_inside_it(self):
+        merged = load_merged_pull_requests('o/r')
+        self.assertEqual([pr['number'] for pr in merged], [7])
+        self.assertEqual(merged[0]['merged_by_type'], 'Bot')
+
+    def test_automated_merge_check_passes(self):
+        result = check_l2_3_automated_pr_merges('o/r')
+        self.assertEqual(result.status, Status.PASSED)
+        self.assertEqual(result.metric, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+
+from utils.github_api import APIResponse
+from utils.rate_limit import SECONDARY_BACKOFF, RateLimitScheduler
+
+
+def response(status, body=b'{}', headers=None):
+    return APIResponse(status, headers or {}, body, 'https://api.github.com/repos/o/r')
+
+
+class AfterResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = RateLimitScheduler(clock=lambda: 1000.0, sleep=lambda seconds: None)
+
+    def test_bare_429_backs_off_exponentially(self):
+        self.assertEqual(self.scheduler.after_response('core', response(429)), SECONDARY_BACKOFF)
+        self.assertEqual(self.scheduler.after_response('core', response(429)), SECONDARY_BACKOFF * 2)
+
+    def test_plain_403_stands(self):
+        self.assertIsNone(self.scheduler.after_response('core', response(403, b'{"message": "Must have admin rights"}')))
+
+
+if __name__ == '__main__':
+    unittest.main()
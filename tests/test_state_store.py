@@ -0,0 +1,27 @@
+import unittest
+
+from utils.state_store import settings_fingerprint
+
+# /orgs/{org}/repos returns minimal repository records
+ORG_RECORD = {
+    'full_name': 'o/r', 'default_branch': 'main', 'visibility': 'private', 'private': True, 'archived': False,
+    'has_issues': True, 'has_projects': False, 'has_wiki': False, 'topics': ['payments'],
+    'security_and_analysis': {'secret_scanning': {'status': 'enabled'}},
+}
+
+# /repos/{repo} adds the merge settings and other fields
+FULL_RECORD = dict(ORG_RECORD, allow_merge_commit=True, allow_squash_merge=True, allow_rebase_merge=False,
+                   allow_auto_merge=False, delete_branch_on_merge=True, subscribers_count=3)
+
+
+class SettingsFingerprintTest(unittest.TestCase):
+    def test_org_record_and_full_record_match(self):
+        self.assertEqual(settings_fingerprint(ORG_RECORD), settings_fingerprint(FULL_RECORD))
+
+    def test_security_settings_change_is_detected(self):
+        changed = dict(ORG_RECORD, security_and_analysis={'secret_scanning': {'status': 'disabled'}})
+        self.assertNotEqual(settings_fingerprint(ORG_RECORD), settings_fingerprint(changed))
+
+
+if __name__ == '__main__':
+    unittest.main()
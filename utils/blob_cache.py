@@ -0,0 +1,126 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.http_cache import default_cache_dir
+
+# Content-addressed cache of artifacts derived from git blobs
+# A git blob never changes once written, so anything computed from it (decoded text, rule
+# counts, keyword hits, ...) is valid forever and is shared across repos and runs: a workflow
+# or .gitignore seen in any repo before is neither downloaded nor parsed again. Entries are
+# keyed by blob sha and artifact kind, never expire, and the least recently used ones are
+# evicted once the cache grows past its size cap.
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+_use_blob_cache = not os.environ.get('DSOMM_NO_CACHE')
+_blob_cache_path = None
+_blob_cache = None
+_blob_cache_lock = threading.Lock()
+
+
+class BlobCache:
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if path is None:
+            path = os.path.join(default_cache_dir(), 'blob_cache.sqlite')
+        os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript('''
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS artifacts (
+                sha TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (sha, kind)
+            );
+            CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts (last_used);
+        ''')
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts').fetchone()[0]
+
+    def get(self, sha, kind):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value FROM artifacts WHERE sha = ? AND kind = ?', (sha, kind)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                'UPDATE artifacts SET last_used = ? WHERE sha = ? AND kind = ?', (time.time(), sha, kind)
+            )
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, sha, kind, value):
+        encoded = json.dumps(value)
+        size = len(encoded) + len(sha) + len(kind)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._db.execute(
+                'SELECT size FROM artifacts WHERE sha = ? AND kind = ?', (sha, kind)
+            ).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)', (sha, kind, encoded, size, time.time())
+            )
+            self._size += size - (previous[0] if previous else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back under its size cap
+        while self._size > self.max_bytes:
+            rows = self._db.execute(
+                'SELECT sha, kind, size FROM artifacts ORDER BY last_used LIMIT 100'
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for sha, kind, size in rows:
+                self._db.execute('DELETE FROM artifacts WHERE sha = ? AND kind = ?', (sha, kind))
+                self._size -= size
+                if self._size <= self.max_bytes:
+                    return
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def configure_blob_cache(enabled=True, path=None):
+    # Must be called before the first artifact is looked up
+    global _use_blob_cache, _blob_cache_path
+    _use_blob_cache = enabled
+    _blob_cache_path = path
+
+
+def get_blob_cache():
+    global _blob_cache
+    if _blob_cache is None and _use_blob_cache:
+        with _blob_cache_lock:
+            if _blob_cache is None:
+                _blob_cache = BlobCache(_blob_cache_path)
+    return _blob_cache
+
+
+def cached_blob_artifact(sha, kind, compute):
+    # compute() may return None (e.g. the blob could not be read); that is not cached
+    cache = get_blob_cache() if sha else None
+    if cache is not None:
+        value = cache.get(sha, kind)
+        if value is not None:
+            return value
+    value = compute()
+    if cache is not None and value is not None:
+        cache.put(sha, kind, value)
+    return value
@@ -0,0 +1,126 @@
+import functools
+import importlib
+import sys
+import threading
+from importlib.metadata import entry_points
+
+import yaml
+
+from utils.check_result import CheckResult, error
+
+# Check registry
+# The check catalogue (dsomm_checks.yaml) is read on first use, not at import, and compiled into
+# a name -> (level, catalogue entry) map, so level, support and function lookups are dict hits
+# whatever the size of the catalogue. Check modules are imported the first time their check runs
+# and the function is kept for every later call.
+# Third-party packages can add checks through the 'dsomm.checks' entry point group. The entry
+# point name is '<LEVEL>/<check name>' (e.g. 'LEVEL3/License compliance') and its object is the
+# check function; it is only imported when the check runs. A plugin that returns anything but a
+# CheckResult is reported as an error for that check.
+
+ENTRY_POINT_GROUP = 'dsomm.checks'
+
+
+def load_check_levels(yaml_file):
+    with open(yaml_file, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def group_entry_points(group):
+    # entry_points(group=...) is Python 3.10+; older versions return a dict of groups
+    if sys.version_info >= (3, 10):
+        return entry_points(group=group)
+    return entry_points().get(group, [])
+
+
+def discover_checks(group=ENTRY_POINT_GROUP):
+    # (level, catalogue entry) of every installed check plugin; names without a level are skipped
+    for entry_point in group_entry_points(group):
+        level, _, name = entry_point.name.partition('/')
+        if level and name:
+            yield level.strip().upper(), {'name': name.strip(), 'supported': True, 'entry_point': entry_point}
+
+
+def plugin_check(name, function):
+    @functools.wraps(function)
+    def check(repo):
+        result = function(repo)
+        if isinstance(result, CheckResult):
+            return result
+        return error(f"Plugin {name} returned {type(result).__name__}")
+    return check
+
+
+class CheckRegistry:
+    def __init__(self, yaml_file, entry_point_group=ENTRY_POINT_GROUP):
+        self.yaml_file = yaml_file
+        self.entry_point_group = entry_point_group
+        self._lock = threading.Lock()
+        self._levels = None
+        self._checks = None
+        self._functions = {}
+
+    def _catalogue(self):
+        if self._checks is None:
+            with self._lock:
+                if self._checks is None:
+                    levels = load_check_levels(self.yaml_file)
+                    if self.entry_point_group:
+                        for level, check in discover_checks(self.entry_point_group):
+                            levels.setdefault(level, []).append(check)
+                    checks = {}
+                    for level, level_checks in levels.items():
+                        for check in level_checks:
+                            # Catalogue entries win over plugins of the same name
+                            checks.setdefault(check['name'], (level, check))
+                    self._levels = levels
+                    self._checks = checks
+        return self._checks
+
+    def levels(self):
+        # level -> catalogue entries, in catalogue order
+        self._catalogue()
+        return self._levels
+
+    def names(self):
+        return list(self._catalogue())
+
+    def supported_names(self):
+        return [name for name, (_, check) in self._catalogue().items() if check.get('supported', False)]
+
+    def level(self, name):
+        entry = self._catalogue().get(name)
+        return entry[0] if entry else "Unknown"
+
+    def is_supported(self, name):
+        entry = self._catalogue().get(name)
+        return bool(entry and entry[1].get('supported', False))
+
+    def module_name(self, name):
+        entry = self._catalogue().get(name)
+        return entry[1].get('module') if entry else None
+
+    def function(self, name):
+        function = self._functions.get(name)
+        if function is None:
+            function = self._import(name)
+            self._functions[name] = function
+        return function
+
+    def _import(self, name):
+        entry = self._catalogue().get(name)
+        if entry is None or not entry[1].get('supported', False):
+            raise ValueError(f"Not Supported - Manual Process")
+        check = entry[1]
+        if 'entry_point' in check:
+            return plugin_check(name, check['entry_point'].load())
+        module_name = check.get('module')
+        if not module_name:
+            raise ValueError(f"Module name not found for supported check '{name}' in checks directory.")
+        try:
+            module = importlib.import_module(f'checks.{module_name}')
+            return getattr(module, f'check_{module_name}')
+        except ImportError:
+            raise ImportError(f"Error: Module 'checks.{module_name}' not found. Please ensure the file 'checks/{module_name}.py' exists.")
+        except AttributeError:
+            raise AttributeError(f"Error: Function 'check_{module_name}' not found in module 'checks.{module_name}'. Please ensure the function is defined correctly.")
@@ -0,0 +1,67 @@
+from enum import IntEnum
+
+# Structured check results
+# Checks return a CheckResult instead of a bare string: a status code that scoring works on,
+# an optional numeric metric (counts such as packages, PRs or rules found), optional evidence
+# (the indicators the check found) and the human-readable text shown in reports. str() of a
+# result is that text, so reports read exactly as before.
+
+
+class Status(IntEnum):
+    FAILED = 0
+    PASSED = 1
+    UNABLE_TO_CHECK = 2
+    ERROR = 3
+    NOT_SUPPORTED = 4
+    TIMED_OUT = 5
+
+
+class CheckResult:
+    __slots__ = ('status', 'text', 'metric', 'evidence')
+
+    def __init__(self, status, text, metric=None, evidence=None):
+        self.status = Status(status)
+        self.text = text
+        self.metric = metric
+        self.evidence = evidence
+
+    @property
+    def passed(self):
+        return self.status == Status.PASSED
+
+    def to_dict(self):
+        return {'status': int(self.status), 'text': self.text, 'metric': self.metric, 'evidence': self.evidence}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['status'], data['text'], data.get('metric'), data.get('evidence'))
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"CheckResult({self.status.name}, {self.text!r})"
+
+
+def passed(text, metric=None, evidence=None):
+    return CheckResult(Status.PASSED, text, metric, evidence)
+
+
+def failed(text="Not detected", metric=None, evidence=None):
+    return CheckResult(Status.FAILED, text, metric, evidence)
+
+
+def unable_to_check(text="Unable to check"):
+    return CheckResult(Status.UNABLE_TO_CHECK, text)
+
+
+def error(text="Error exception"):
+    return CheckResult(Status.ERROR, text)
+
+
+def timed_out(text="Timed out"):
+    return CheckResult(Status.TIMED_OUT, text)
+
+
+def not_supported(text):
+    return CheckResult(Status.NOT_SUPPORTED, text)
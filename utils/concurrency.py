@@ -0,0 +1,111 @@
+import sys
+import threading
+import time
+from collections import deque
+
+from utils.deadlines import check_deadline, remaining
+
+# Adaptive limit on API requests in flight (AIMD)
+# The limit grows by one after every round of `limit` completed requests whose mean latency
+# stayed within LATENCY_TOLERANCE of the best round seen recently, and is cut by DECREASE_FACTOR
+# when a request is throttled (403/429 rate limit answers) or a round's latency rises above that.
+# Requests that were already in flight when the limit was cut cannot cut it again, so one burst
+# of throttling counts once. Every change is kept with its reason, so a run can report how it
+# arrived at the limit it ended with for the token and host in use.
+
+DEFAULT_INITIAL_LIMIT = 8
+DEFAULT_MAX_LIMIT = 32
+MIN_LIMIT = 1
+DECREASE_FACTOR = 0.5
+LATENCY_TOLERANCE = 1.5
+# Rounds faster than this are never treated as a latency rise
+LATENCY_SLACK = 0.05
+BASELINE_ROUNDS = 10
+MAX_CHANGES = 100
+
+
+class _Ticket:
+    __slots__ = ('started',)
+
+    def __init__(self):
+        self.started = time.monotonic()
+
+
+class AIMDLimiter:
+    def __init__(self, initial=DEFAULT_INITIAL_LIMIT, maximum=DEFAULT_MAX_LIMIT, minimum=MIN_LIMIT):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.in_flight = 0
+        self.changes = deque(maxlen=MAX_CHANGES)
+        self.change_count = 0
+        self._lowest = self.limit
+        self._highest = self.limit
+        self._round_latency = 0.0
+        self._round_count = 0
+        self._recent_rounds = deque(maxlen=BASELINE_ROUNDS)
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                check_deadline()
+                self._condition.wait(remaining())
+            self.in_flight += 1
+        return _Ticket()
+
+    def release(self, ticket, latency=None, throttled=False):
+        # latency is None for requests that failed in transport; they do not move the limit
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                if ticket.started > self._last_decrease:
+                    self._decrease("throttled by GitHub (HTTP 403/429)")
+            elif latency is not None:
+                self._observe(ticket, latency)
+            self._condition.notify_all()
+
+    def _observe(self, ticket, latency):
+        self._round_latency += latency
+        self._round_count += 1
+        if self._round_count < self.limit:
+            return
+        mean = self._round_latency / self._round_count
+        baseline = min(self._recent_rounds, default=mean)
+        self._recent_rounds.append(mean)
+        self._round_latency = 0.0
+        self._round_count = 0
+        if mean > LATENCY_SLACK and mean > baseline * LATENCY_TOLERANCE:
+            if ticket.started > self._last_decrease:
+                self._decrease(f"latency rose to {mean * 1000:.0f}ms (baseline {baseline * 1000:.0f}ms)")
+        elif self.limit < self.maximum:
+            self._change(self.limit + 1, f"latency flat at {mean * 1000:.0f}ms")
+
+    def _decrease(self, reason):
+        self._last_decrease = time.monotonic()
+        # Latencies seen at the old limit are no baseline for the new one
+        self._recent_rounds.clear()
+        self._change(max(self.minimum, int(self.limit * DECREASE_FACTOR)), reason)
+
+    def _change(self, limit, reason):
+        if limit == self.limit:
+            return
+        self.changes.append((time.time(), self.limit, limit, reason))
+        self.change_count += 1
+        self.limit = limit
+        self._lowest = min(self._lowest, limit)
+        self._highest = max(self._highest, limit)
+
+    def summary(self):
+        with self._condition:
+            return {'limit': self.limit, 'lowest': self._lowest, 'highest': self._highest,
+                    'change_count': self.change_count, 'changes': list(self.changes)}
+
+
+def print_limiter_summary(limiter, out=sys.stderr):
+    summary = limiter.summary()
+    print(f"Adaptive concurrency: ended at {summary['limit']} requests in flight "
+          f"(range {summary['lowest']}-{summary['highest']}, {summary['change_count']} changes)", file=out)
+    for at, old, new, reason in summary['changes'][-5:]:
+        print(f"  {time.strftime('%H:%M:%S', time.localtime(at))} {old} -> {new}: {reason}", file=out)
@@ -0,0 +1,118 @@
+import math
+import os
+import sys
+import threading
+from urllib.parse import urlsplit
+
+# Pool of API credentials (personal access tokens or GitHub App installation tokens)
+# Each request goes out with the credential that has the most of its rate limit budget left
+# (tracked per credential by the RateLimitScheduler), skipping credentials that are paused by a
+# rate limit while another one can send right away. Endpoints that need elevated scopes are only
+# routed to credentials that have them, as reported by the X-OAuth-Scopes header of their
+# responses; credentials that report no scopes (fine-grained and App tokens) are used for them
+# when no credential is known to have the scopes. Tokens are configured as
+#   DSOMM_TOKENS  - comma-separated tokens, and / or
+#   --tokens-file - one token per line, optionally labelled as `label=token`
+# and are only ever shown by their label.
+
+# Endpoint path fragment -> classic token scopes, any of which grants access
+ELEVATED_ENDPOINTS = [
+    ('/secret-scanning/', {'repo', 'security_events'}),
+    ('/dependabot/alerts', {'repo', 'security_events'}),
+    ('/vulnerability-alerts', {'repo'}),
+    ('/code-scanning/', {'repo', 'security_events'}),
+]
+
+
+class Credential:
+    def __init__(self, name, token):
+        self.name = name
+        self.token = token
+        # None until a response reports the token's scopes
+        self.scopes = None
+        self.requests = 0
+        self.throttled = 0
+
+    def observe(self, response, throttled=False):
+        if throttled:
+            self.throttled += 1
+        if 'x-oauth-scopes' in response.headers:
+            self.scopes = {scope.strip() for scope in response.headers['x-oauth-scopes'].split(',') if scope.strip()}
+
+
+def required_scopes(url):
+    path = urlsplit(url).path
+    for fragment, scopes in ELEVATED_ENDPOINTS:
+        if fragment in path:
+            return scopes
+    return None
+
+
+def parse_tokens(lines, prefix='token'):
+    # [(label, token)] from `token` or `label=token` entries; blanks and comments are skipped
+    tokens = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        label, _, token = line.rpartition('=')
+        tokens.append((label.strip() or f"{prefix}-{len(tokens) + 1}", token.strip()))
+    return tokens
+
+
+def load_tokens(tokens_file=None):
+    tokens = parse_tokens(os.environ.get('DSOMM_TOKENS', '').split(','), prefix='env')
+    if tokens_file:
+        with open(tokens_file, 'r') as f:
+            tokens.extend(parse_tokens(f, prefix='file'))
+    return tokens
+
+
+class CredentialPool:
+    def __init__(self, credentials, scheduler=None):
+        self.credentials = list(credentials)
+        self.scheduler = scheduler
+        self._lock = threading.Lock()
+
+    def select(self, url, resource):
+        candidates = self.credentials
+        scopes = required_scopes(url)
+        if scopes:
+            granted = [c for c in candidates if c.scopes is not None and c.scopes & scopes]
+            unknown = [c for c in candidates if c.scopes is None]
+            candidates = granted or unknown or candidates
+        with self._lock:
+            credential = min(candidates, key=lambda candidate: self._cost(candidate, resource))
+            credential.requests += 1
+            return credential
+
+    def observe(self, credential, response, throttled=False):
+        with self._lock:
+            credential.observe(response, throttled)
+
+    def _cost(self, credential, resource):
+        # Credentials that can send now come first, then the one with the largest budget left
+        if self.scheduler is None:
+            return 0, credential.requests
+        wait = self.scheduler.wait_time(resource, credential.name)
+        remaining = self.scheduler.remaining(resource, credential.name)
+        return wait, -(math.inf if remaining is None else remaining), credential.requests
+
+    def usage(self, resource='core'):
+        # (label, requests, throttled, remaining, limit) per credential
+        rows = []
+        for credential in self.credentials:
+            remaining, limit = (None, None)
+            if self.scheduler is not None:
+                remaining, limit = self.scheduler.budget(resource, credential.name)
+            rows.append((credential.name, credential.requests, credential.throttled, remaining, limit))
+        return rows
+
+
+def print_credential_usage(pool, out=sys.stderr):
+    if len(pool.credentials) < 2:
+        return
+    print("Token usage:", file=out)
+    for name, requests, throttled, remaining, limit in pool.usage():
+        budget = f", core budget {remaining}/{limit} left" if remaining is not None and limit else ""
+        print(f"  {name}: {requests} requests, {throttled} throttled{budget}", file=out)
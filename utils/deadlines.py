@@ -0,0 +1,107 @@
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+
+# Deadlines for checks and for the whole run
+# A deadline scope puts an absolute (monotonic) deadline into the current context; nested scopes
+# keep the tightest one. The request layer bounds socket timeouts and rate limit pauses by the
+# time left, and raises DeadlineExceeded once it is gone. Like asyncio.CancelledError it derives
+# from BaseException, so it passes through the checks' `except Exception` handlers and the
+# executor reports the check as timed out instead of "Unable to check" or an error. Within a
+# deadline scope, a request that hits its own timeout raises RequestTimeout (a DeadlineExceeded)
+# for the same reason: checks must not read a missing answer as "not enabled" or "not detected".
+#   check_timeout - seconds a single check may take, including its rate limit pauses
+#   time_budget   - seconds the whole run may take; checks still running or not started when it
+#                   is used up are reported as timed out
+
+_current_deadline = contextvars.ContextVar('deadline', default=None)
+
+_check_timeout = None
+_run_deadline = None
+
+
+class DeadlineExceeded(BaseException):
+    pass
+
+
+class RequestTimeout(DeadlineExceeded):
+    # A single request ran past its own timeout; the deadline itself may have time left
+    pass
+
+
+class Deadline:
+    def __init__(self, at, label):
+        self.at = at
+        self.label = label
+        # Requests that hit their own timeout while this deadline was current
+        self.request_timeouts = 0
+
+    def remaining(self):
+        return self.at - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def configure_deadlines(check_timeout=None, time_budget=None):
+    # The run budget starts counting when it is configured
+    global _check_timeout, _run_deadline
+    _check_timeout = check_timeout
+    _run_deadline = time.monotonic() + time_budget if time_budget else None
+
+
+def current_deadline():
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(seconds=None, label='deadline', at=None):
+    at = min(at if at is not None else math.inf, time.monotonic() + seconds if seconds else math.inf)
+    parent = _current_deadline.get()
+    if parent is not None and parent.at <= at:
+        at, label = parent.at, parent.label
+    token = _current_deadline.set(Deadline(at, label))
+    try:
+        yield _current_deadline.get()
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_scope():
+    # Deadline scope of one check: the configured check timeout, bounded by the run budget
+    label = f"check timeout ({_check_timeout:g}s)" if _check_timeout else 'run time budget'
+    return deadline_scope(_check_timeout, label, at=_run_deadline)
+
+
+def remaining():
+    # Seconds left in the current deadline, or None without one
+    deadline = _current_deadline.get()
+    return None if deadline is None or deadline.at == math.inf else deadline.remaining()
+
+
+def check_deadline():
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(deadline.label)
+
+
+def bounded_timeout(timeout):
+    # A timeout for one blocking call that does not run past the current deadline
+    check_deadline()
+    left = remaining()
+    return timeout if left is None or (timeout is not None and timeout <= left) else left
+
+
+def sleep(seconds):
+    # Sleeps that cannot finish before the deadline fail right away instead of overrunning it
+    left = remaining()
+    if left is not None and seconds >= left:
+        raise DeadlineExceeded(_current_deadline.get().label)
+    time.sleep(seconds)
+
+
+def note_request_timeout():
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.request_timeouts += 1
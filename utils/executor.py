@@ -0,0 +1,99 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.check_result import Status, error, timed_out, unable_to_check
+from utils.deadlines import DeadlineExceeded, check_deadline, check_scope
+from utils.rate_limit import RateLimitExceeded
+from utils.request_cache import RequestCache, request_scope
+
+# Bounded concurrent execution of (repo, check) work items
+# Checks are almost entirely I/O wait, so a shared thread pool runs them concurrently:
+#   workers          - global limit of checks in flight across all repos
+#   per_repo_workers - limit of checks in flight for a single repo
+# Repos are admitted progressively (at most max_active_repos open at once) and results are
+# yielded in input order, so output stays deterministic and memory stays bounded.
+# Each check runs within its deadline scope (utils/deadlines.py): checks that run out of time, or
+# fail after one of their requests timed out, are reported as timed out. Checks whose requests
+# stay rate limited after every retry are reported as unable to check.
+
+DEFAULT_WORKERS = int(os.environ.get('DSOMM_WORKERS', 8))
+DEFAULT_PER_REPO_WORKERS = int(os.environ.get('DSOMM_PER_REPO_WORKERS', 4))
+
+
+class _RepoRun:
+    def __init__(self, repo, checks):
+        self.repo = repo
+        self.checks = list(checks)
+        self.next_check = 0
+        self.remaining = len(self.checks)
+        self.results = {}
+        self.cache = RequestCache()
+
+
+def iter_repo_results(repos, selected_checks, run_check, workers=None, per_repo_workers=None, max_active_repos=None):
+    workers = max(1, workers or DEFAULT_WORKERS)
+    per_repo_workers = max(1, per_repo_workers or DEFAULT_PER_REPO_WORKERS)
+    max_active_repos = max(1, max_active_repos or workers)
+    repos = list(repos)
+    selected_checks = list(selected_checks)
+
+    done = {}
+    condition = threading.Condition()
+
+    def execute(run, check):
+        # Each repo keeps one request scope shared by all its checks, whichever thread runs them
+        with request_scope(run.cache), check_scope() as deadline:
+            try:
+                check_deadline()
+                result = run_check(run.repo, check)
+                # A check that swallowed a request timeout cannot be trusted with anything but a pass.
+                # Reading the status here also turns a result that is not a CheckResult into an error
+                if result.status != Status.PASSED and deadline.request_timeouts:
+                    return timed_out("Timed out: request timeout")
+                return result
+            except DeadlineExceeded as e:
+                return timed_out(f"Timed out: {e}")
+            except RateLimitExceeded as e:
+                return unable_to_check(f"Unable to check: rate limited ({e})")
+            except Exception as e:
+                return error(f"Error: {e}")
+
+    def submit_next(pool, index, run):
+        # Called with the condition held
+        check = run.checks[run.next_check]
+        run.next_check += 1
+        future = pool.submit(execute, run, check)
+        future.add_done_callback(lambda f: finished(pool, index, run, check, f))
+
+    def finished(pool, index, run, check, future):
+        with condition:
+            run.results[check] = future.result()
+            run.remaining -= 1
+            if run.next_check < len(run.checks):
+                submit_next(pool, index, run)
+            elif run.remaining == 0:
+                done[index] = {c: run.results[c] for c in run.checks}
+                condition.notify_all()
+
+    def admit(pool, index):
+        run = _RepoRun(repos[index], selected_checks)
+        if not run.checks:
+            done[index] = {}
+            return
+        for _ in range(min(per_repo_workers, len(run.checks))):
+            # A check that finished at once has already submitted the next one from its callback
+            if run.next_check < len(run.checks):
+                submit_next(pool, index, run)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        admitted = 0
+        for index, repo in enumerate(repos):
+            with condition:
+                while admitted < len(repos) and admitted - index < max_active_repos:
+                    admit(pool, admitted)
+                    admitted += 1
+                while index not in done:
+                    condition.wait()
+                results = done.pop(index)
+            yield repo, results
@@ -1,29 +1,63 @@
-import subprocess
 import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from utils.executor import DEFAULT_WORKERS
+from utils.github_api import gh_api, parse_link_header, GitHubAPIError
+from utils.repo_facts import set_repo_facts
 
-def get_repos_from_org(org_name):
+# Org repository enumeration
+# The first page's Link header names the last page, so the remaining pages are requested in
+# parallel instead of one after another. Archived repos and forks are skipped unless asked for.
+# Each listed repo record is kept as the repo's metadata fact (utils/repo_metadata.py), so the
+# checks do not fetch /repos/{repo} again.
+
+PER_PAGE = 100
+
+
+def last_page_number(response):
+    last_url = parse_link_header(response.headers.get('link')).get('last')
+    if not last_url:
+        return 1
+    return int(parse_qs(urlsplit(last_url).query).get('page', ['1'])[0])
+
+
+def fetch_org_repo_pages(org_name, workers=None):
+    first = gh_api(f'/orgs/{org_name}/repos?per_page={PER_PAGE}&page=1', check=True)
+    pages = [first.json()]
+    last_page = last_page_number(first)
+    if last_page > 1:
+        def fetch_page(page):
+            return gh_api(f'/orgs/{org_name}/repos?per_page={PER_PAGE}&page={page}', check=True).json()
+        with ThreadPoolExecutor(max_workers=min(workers or DEFAULT_WORKERS, last_page - 1)) as pool:
+            pages.extend(pool.map(fetch_page, range(2, last_page + 1)))
+    return [repo for page in pages for repo in page]
+
+
+def get_repos_from_org(org_name, include_archived=False, include_forks=False):
     try:
-        page = 1
-        per_page = 100
-        hasPages = True
-        all_repos = []
-
-        while hasPages:
-            result = subprocess.run(
-                ['gh', 'api', f'/orgs/{org_name}/repos?per_page={per_page}&page={page}'],
-                capture_output=True, text=True
-            )
-            
-            if result.returncode == 0 and result.stdout != '[]':
-                all_repos.extend(json.loads(result.stdout))
-                page += 1
-            else:
-                hasPages = False
-
-        return [repo['full_name'] for repo in all_repos]
-    except subprocess.CalledProcessError:
+        all_repos = fetch_org_repo_pages(org_name)
+
+        repos = []
+        for repo in all_repos:
+            if repo.get('archived') and not include_archived:
+                continue
+            if repo.get('fork') and not include_forks:
+                continue
+            # Seed the metadata the checks would otherwise fetch from /repos/{repo}
+            set_repo_facts(repo['full_name'], {'metadata': repo})
+            repos.append(repo['full_name'])
+        return repos
+    except GitHubAPIError:
         return "Unable to get repos"
     except json.JSONDecodeError:
         return "Error"
     except Exception as e:
         return f"Error: {str(e)}"
+
+
+def get_repos_from_orgs(org_names, include_archived=False, include_forks=False):
+    # Orgs are enumerated concurrently; repos keep the order of the given orgs
+    org_names = list(dict.fromkeys(org_names))
+    with ThreadPoolExecutor(max_workers=max(1, min(len(org_names), 4))) as pool:
+        results = pool.map(lambda org: get_repos_from_org(org, include_archived, include_forks), org_names)
+        return dict(zip(org_names, results))
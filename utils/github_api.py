@@ -0,0 +1,551 @@
+import contextvars
+import gzip
+import http.client
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit
+
+from utils.concurrency import AIMDLimiter
+from utils.credentials import Credential, CredentialPool
+from utils.deadlines import DeadlineExceeded, RequestTimeout, bounded_timeout, check_deadline, current_deadline, note_request_timeout, remaining
+from utils.http_cache import HTTPCache
+from utils.rate_limit import RateLimitExceeded, RateLimitScheduler, resource_for
+from utils.request_cache import current_cache
+
+# Shared in-process GitHub REST client used by every check
+# Replaces one `gh api` subprocess per request with pooled keep-alive connections,
+# gzip transfer encoding and the same token lookup order as the GitHub CLI:
+#   GH_TOKEN / GITHUB_TOKEN (github.com) or GH_ENTERPRISE_TOKEN / GITHUB_ENTERPRISE_TOKEN (GHES),
+#   falling back to the token stored by `gh auth login` (looked up once per process)
+# Every request is bounded by its own timeout and by the current check or run deadline
+# (utils/deadlines.py). GETs that take longer than the recent 95th percentile latency are hedged:
+# a second copy is sent and whichever answers first is used, the other one is cancelled by
+# closing its connection. Hedges are capped at HEDGE_RATIO of all requests.
+# An optional AIMDLimiter (utils/concurrency.py) bounds the requests in flight and adapts that
+# bound to the latency and throttling it observes. With several tokens, each request is sent with
+# the credential the CredentialPool (utils/credentials.py) picks for it.
+
+DEFAULT_HOST = 'github.com'
+DEFAULT_TIMEOUT = 30
+MAX_IDLE_CONNECTIONS = 16
+USER_AGENT = 'dsomm-baseline'
+
+LATENCY_SAMPLES = 200
+MIN_LATENCY_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+MIN_HEDGE_DELAY = 1.0
+HEDGE_RATIO = 0.05
+HEDGE_WORKERS = 32
+
+
+class GitHubAPIError(Exception):
+    def __init__(self, status, message, url=None):
+        super().__init__(f"HTTP {status}: {message}" if status else message)
+        self.status = status
+        self.message = message
+        self.url = url
+
+
+class APIResponse:
+    def __init__(self, status, headers, body, url):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def raise_for_status(self):
+        if not self.ok:
+            message = self.reason()
+            raise GitHubAPIError(self.status, message, self.url)
+
+    def reason(self):
+        try:
+            return self.json().get('message', '')
+        except (ValueError, AttributeError):
+            return self.text[:200]
+
+    def definitive(self):
+        # Answers that a refetch within the same run would repeat: successes, missing resources and
+        # plain permission errors, but not rate limits, server errors or transport failures
+        if self.ok or self.status in (304, 404, 410):
+            return True
+        if self.status == 403:
+            return not ('retry-after' in self.headers or self.headers.get('x-ratelimit-remaining') == '0'
+                        or 'rate limit' in self.reason().lower())
+        return False
+
+
+def resolve_host():
+    return os.environ.get('GH_HOST', DEFAULT_HOST)
+
+
+def resolve_api_url(host):
+    if os.environ.get('GITHUB_API_URL'):
+        return os.environ['GITHUB_API_URL'].rstrip('/')
+    if host == DEFAULT_HOST:
+        return 'https://api.github.com'
+    return f'https://{host}/api/v3'
+
+
+def resolve_graphql_url(host, api_url):
+    if os.environ.get('GITHUB_GRAPHQL_URL'):
+        return os.environ['GITHUB_GRAPHQL_URL']
+    if os.environ.get('GITHUB_API_URL') or host == DEFAULT_HOST:
+        return api_url + '/graphql'
+    # GitHub Enterprise Server serves GraphQL next to, not under, the /api/v3 REST root
+    return f'https://{host}/api/graphql'
+
+
+def resolve_token(host):
+    if host == DEFAULT_HOST:
+        env_names = ['GH_TOKEN', 'GITHUB_TOKEN']
+    else:
+        env_names = ['GH_ENTERPRISE_TOKEN', 'GITHUB_ENTERPRISE_TOKEN']
+    for name in env_names:
+        if os.environ.get(name):
+            return os.environ[name]
+
+    # Same credential store as `gh`, read once instead of on every request
+    try:
+        result = subprocess.run(
+            ['gh', 'auth', 'token', '--hostname', host],
+            capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    if result.returncode == 0 and result.stdout.strip():
+        return result.stdout.strip()
+    return None
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class _Attempt:
+    # One copy of a hedged request; cancel() aborts it by shutting down its connection
+    def __init__(self):
+        self.conn = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def attach(self, conn):
+        with self._lock:
+            if self.cancelled:
+                raise RequestCancelled()
+            self.conn = conn
+
+    def detach(self):
+        # Called before the connection goes back to the pool, so a late cancel() cannot shut down
+        # a pooled socket; False when the attempt was cancelled and the connection is unusable
+        with self._lock:
+            self.conn = None
+            return not self.cancelled
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            conn = self.conn
+            if conn is not None and conn.sock is not None:
+                try:
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+class LatencyTracker:
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self):
+        # None until enough latencies are known, or while the hedge budget is used up
+        with self._lock:
+            self.requests += 1
+            if len(self._samples) < MIN_LATENCY_SAMPLES or self.hedges >= self.requests * HEDGE_RATIO:
+                return None
+            ordered = sorted(self._samples)
+        return max(MIN_HEDGE_DELAY, ordered[int(len(ordered) * HEDGE_PERCENTILE)])
+
+    def count_hedge(self, won=False):
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedges += 1
+
+
+class ConnectionPool:
+    def __init__(self, max_idle=MAX_IDLE_CONNECTIONS, timeout=DEFAULT_TIMEOUT):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme, netloc):
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop(), True
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout), False
+        return http.client.HTTPConnection(netloc, timeout=self.timeout), False
+
+    def release(self, scheme, netloc, conn):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+class GitHubClient:
+    def __init__(self, api_url=None, token=None, host=None, timeout=DEFAULT_TIMEOUT, cache=None, scheduler=None, hedging=True,
+                 limiter=None, tokens=None):
+        # tokens: [(label, token)] to spread the requests over; defaults to the single resolved token
+        self.host = host or resolve_host()
+        self.api_url = (api_url or resolve_api_url(self.host)).rstrip('/')
+        self.graphql_url = resolve_graphql_url(self.host, self.api_url)
+        if not tokens:
+            tokens = [('default', token if token is not None else resolve_token(self.host))]
+        self.credentials = CredentialPool([Credential(name, value) for name, value in tokens], scheduler)
+        self.timeout = timeout
+        self.pool = ConnectionPool(timeout=timeout)
+        self.cache = cache
+        self.scheduler = scheduler
+        self.latency = LatencyTracker()
+        self.limiter = limiter
+        self._hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS) if hedging else None
+
+    def build_url(self, path):
+        if path.startswith(('http://', 'https://')):
+            return path
+        return self.api_url + '/' + path.lstrip('/')
+
+    def default_headers(self):
+        headers = {
+            'Accept': 'application/vnd.github+json',
+            'Accept-Encoding': 'gzip',
+            'User-Agent': USER_AGENT,
+            'X-GitHub-Api-Version': '2022-11-28',
+        }
+        return headers
+
+    def authorized(self, request_headers, credential):
+        if not credential.token:
+            return request_headers
+        return {**request_headers, 'Authorization': f'Bearer {credential.token}'}
+
+    def request(self, method, path, headers=None, body=None):
+        url = self.build_url(path)
+        request_headers = self.default_headers()
+        if headers:
+            request_headers.update(headers)
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            request_headers.setdefault('Content-Type', 'application/json')
+
+        if self.cache is None or method != 'GET':
+            return self._dispatch(method, url, request_headers, body)
+
+        # Revalidate a stored copy instead of downloading it again
+        key = f"{url}\n{request_headers['Accept']}"
+        cached = self.cache.lookup(key)
+        if cached is not None:
+            if cached.etag:
+                request_headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                request_headers['If-Modified-Since'] = cached.last_modified
+        response = self._dispatch(method, url, request_headers, body)
+        if response.status == 304 and cached is not None:
+            self.cache.touch(key)
+            fresh_headers = {k: v for k, v in response.headers.items() if k != 'content-length'}
+            return APIResponse(cached.status, {**cached.headers, **fresh_headers}, cached.body, url)
+        if response.status == 200:
+            # The stored body is already decompressed
+            stored_headers = {k: v for k, v in response.headers.items() if k not in ('content-encoding', 'content-length')}
+            self.cache.store(key, response.status, stored_headers, response.body)
+        return response
+
+    def _dispatch(self, method, url, request_headers, body):
+        delay = self.latency.hedge_delay() if self._hedge_pool is not None and method == 'GET' else None
+        if delay is None:
+            return self._send(method, url, request_headers, body)
+
+        # Both copies run on the hedge pool in the caller's context, so they share its deadline
+        attempts = {}
+
+        def submit():
+            attempt = _Attempt()
+            future = self._hedge_pool.submit(
+                contextvars.copy_context().run, self._send, method, url, request_headers, body, attempt
+            )
+            attempts[future] = attempt
+            return future
+
+        primary = submit()
+        left = remaining()
+        done, pending = wait({primary}, timeout=delay if left is None else max(0, min(delay, left)))
+        try:
+            if not done:
+                check_deadline()
+                self.latency.count_hedge()
+                pending.add(submit())
+            while True:
+                for future in done:
+                    if future.exception() is None:
+                        if future is not primary:
+                            self.latency.count_hedge(won=True)
+                        return future.result()
+                    error = future.exception()
+                if not pending:
+                    raise error
+                done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise DeadlineExceeded(current_deadline().label)
+        finally:
+            # The copy that lost (or every copy, once the deadline is gone) is cancelled; finished
+            # copies have already handed their connections back to the pool
+            for future, attempt in attempts.items():
+                if not future.done():
+                    attempt.cancel()
+
+    def _send(self, method, url, request_headers, body, attempt=None):
+        # Rate limited requests are retried once the scheduler's pause is over, or right away with
+        # another credential, instead of failing
+        resource = resource_for(url)
+        retry = 0
+        while True:
+            credential = self.credentials.select(url, resource)
+            if self.scheduler is not None:
+                self.scheduler.before_request(resource, credential.name)
+            headers = self.authorized(request_headers, credential)
+            response, ticket, latency = self._limited_transmit(method, url, headers, body, attempt)
+            delay = None
+            if self.scheduler is not None:
+                delay = self.scheduler.after_response(resource, response, credential.name)
+            # Every 429 is pushback, whether or not the scheduler pauses for it
+            throttled = delay is not None or response.status == 429
+            self.credentials.observe(credential, response, throttled)
+            if ticket is not None:
+                self.limiter.release(ticket, latency, throttled)
+            if delay is None:
+                return response
+            if retry >= self.scheduler.max_retries:
+                # Checks never see the throttled response; outside a check the caller handles it
+                if current_deadline() is not None:
+                    raise RateLimitExceeded(f"still rate limited after {retry} retries (HTTP {response.status})")
+                return response
+            retry += 1
+
+    def _limited_transmit(self, method, url, request_headers, body, attempt):
+        # Returns (response, ticket, latency); the caller releases the ticket once it knows
+        # whether the response was throttled
+        if self.limiter is None:
+            return self._transmit(method, url, request_headers, body, attempt), None, None
+        ticket = self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = self._transmit(method, url, request_headers, body, attempt)
+        except BaseException:
+            self.limiter.release(ticket)
+            raise
+        return response, ticket, time.monotonic() - started
+
+    def _transmit(self, method, url, request_headers, body, attempt=None):
+        parts = urlsplit(url)
+        target = parts.path + (f'?{parts.query}' if parts.query else '')
+
+        # A pooled connection may have been closed by the server while idle,
+        # so a failure on a reused connection is retried once on a fresh one
+        for retry in range(2):
+            timeout = bounded_timeout(self.timeout)
+            conn, reused = self.pool.acquire(parts.scheme, parts.netloc)
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            if attempt is not None:
+                attempt.attach(conn)
+            started = time.monotonic()
+            try:
+                conn.request(method, target, body=body, headers=request_headers)
+                raw = conn.getresponse()
+                payload = raw.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if attempt is not None and attempt.cancelled:
+                    raise RequestCancelled() from e
+                deadline = current_deadline()
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(deadline.label) from e
+                if isinstance(e, socket.timeout):
+                    note_request_timeout()
+                    # Inside a check the timeout ends the check; elsewhere it is a transport failure
+                    if deadline is not None:
+                        raise RequestTimeout(f"request timeout ({timeout:g}s)") from e
+                    raise
+                if reused and retry == 0:
+                    continue
+                raise
+            if method == 'GET' and raw.status < 500:
+                self.latency.record(time.monotonic() - started)
+
+            response_headers = {k.lower(): v for k, v in raw.getheaders()}
+            if response_headers.get('content-encoding') == 'gzip':
+                payload = gzip.decompress(payload)
+            if raw.will_close or (attempt is not None and not attempt.detach()):
+                conn.close()
+            else:
+                self.pool.release(parts.scheme, parts.netloc, conn)
+            return APIResponse(raw.status, response_headers, payload, url)
+
+    def paginate(self, path, headers=None):
+        items = []
+        url = path
+        while url:
+            response = self.request('GET', url, headers=headers)
+            response.raise_for_status()
+            data = response.json()
+            # Some list endpoints wrap the page in an object, e.g. {"workflows": [...]}
+            if isinstance(data, dict):
+                data = next((v for v in data.values() if isinstance(v, list)), [])
+            items.extend(data)
+            url = next_page_url(response)
+        return items
+
+
+def parse_link_header(value):
+    links = {}
+    for part in (value or '').split(','):
+        section = part.split(';')
+        if len(section) < 2:
+            continue
+        url = section[0].strip()[1:-1]
+        for param in section[1:]:
+            name, _, rel = param.strip().partition('=')
+            if name == 'rel':
+                links[rel.strip('"')] = url
+    return links
+
+
+def next_page_url(response):
+    next_url = parse_link_header(response.headers.get('link')).get('next')
+    return urljoin(response.url, next_url) if next_url else None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+_use_cache = not os.environ.get('DSOMM_NO_CACHE')
+_cache_path = None
+_request_timeout = DEFAULT_TIMEOUT
+_hedging = True
+_concurrency = None
+_tokens = None
+
+
+def configure_cache(enabled=True, path=None):
+    # Must be called before the first request creates the shared client
+    global _use_cache, _cache_path
+    _use_cache = enabled
+    _cache_path = path
+
+
+def configure_requests(timeout=DEFAULT_TIMEOUT, hedging=True, concurrency=None, tokens=None):
+    # Must be called before the first request creates the shared client.
+    # concurrency: (initial, maximum) requests in flight for the adaptive limiter, None for no limiter
+    # tokens: [(label, token)] for a credential pool, None for the single token resolved like `gh`
+    global _request_timeout, _hedging, _concurrency, _tokens
+    _request_timeout = timeout
+    _hedging = hedging
+    _concurrency = concurrency
+    _tokens = tokens
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                cache = HTTPCache(_cache_path) if _use_cache else None
+                limiter = AIMDLimiter(*_concurrency) if _concurrency else None
+                _client = GitHubClient(timeout=_request_timeout, cache=cache, scheduler=RateLimitScheduler(),
+                                       hedging=_hedging, limiter=limiter, tokens=_tokens)
+    return _client
+
+
+def set_client(client):
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def _send(method, path, headers, body):
+    try:
+        return get_client().request(method, path, headers=headers, body=body)
+    except (http.client.HTTPException, OSError) as e:
+        return APIResponse(0, {}, str(e).encode('utf-8'), path)
+
+
+def gh_api(path, method='GET', headers=None, body=None, check=False):
+    # Mirrors `gh api`: transport failures and non-2xx statuses yield a response with ok == False,
+    # and check=True raises GitHubAPIError instead (like subprocess.run(..., check=True))
+    cache = current_cache()
+    if cache is not None and method == 'GET' and body is None:
+        # Identical GETs within one repo scope share a single fetch; only definitive answers are kept,
+        # so a rate limit, server error or transport failure is fetched again by the next check
+        key = (method, get_client().build_url(path), tuple(sorted((headers or {}).items())))
+        response = cache.get_or_load(
+            key, lambda: _send(method, path, headers, body), cacheable=APIResponse.definitive
+        )
+    else:
+        response = _send(method, path, headers, body)
+    if check:
+        response.raise_for_status()
+    return response
+
+
+def gh_graphql(query, variables=None):
+    # Returns the response; GraphQL reports most failures as 200 with an "errors" list
+    body = {'query': query, 'variables': variables or {}}
+    return gh_api(get_client().graphql_url, method='POST', body=body)
+
+
+def gh_api_paginate(path, headers=None):
+    try:
+        return get_client().paginate(path, headers=headers)
+    except (http.client.HTTPException, OSError) as e:
+        raise GitHubAPIError(0, str(e), path)
@@ -0,0 +1,108 @@
+import json
+
+from utils.github_api import gh_graphql
+from utils.repo_facts import set_repo_facts
+from utils.repo_files import RepoFileIndex
+
+# GraphQL batch backend for repo-level facts
+# One aliased GraphQL query answers, for up to BATCH_SIZE repos at once, what the checks would
+# otherwise ask the REST API one repo at a time: default branch, the file listings the config
+# probes need (root, .github, .github/workflows, .github/ISSUE_TEMPLATE), the signature of the
+# latest commit, review requests on the latest open PR, reproducibility labels and the
+# vulnerability alert setting. Results are stored as repo facts (utils/repo_facts.py); checks
+# fall back to their REST calls for anything that was not prefetched.
+
+BATCH_SIZE = 25
+
+# Directories whose listings are prefetched; every config file the checks probe lives in one of them
+PREFETCHED_DIRS = ['', '.github', '.github/workflows', '.github/ISSUE_TEMPLATE']
+
+_TREE_FIELDS = '... on Tree { entries { name type oid } }'
+
+_REPO_FIELDS = '''
+    defaultBranchRef {
+      name
+      target { ... on Commit { signature { isValid } } }
+    }
+    %(trees)s
+    pullRequests(states: OPEN, first: 1, orderBy: {field: CREATED_AT, direction: DESC}) {
+      totalCount
+      nodes { reviewRequests(first: 50) { nodes { requestedReviewer { __typename } } } }
+    }
+    labels(first: 100, query: "reproducible") { nodes { name } }
+''' % {
+    'trees': '\n    '.join(
+        f'd{i}: object(expression: "HEAD:{directory}") {{ {_TREE_FIELDS} }}'
+        for i, directory in enumerate(PREFETCHED_DIRS)
+    )
+}
+
+
+def build_batch_query(repos):
+    parts = []
+    for i, repo in enumerate(repos):
+        owner, _, name = repo.partition('/')
+        args = f'owner: {json.dumps(owner)}, name: {json.dumps(name)}'
+        parts.append(f'r{i}: repository({args}) {{{_REPO_FIELDS}}}')
+        # Admin-only; kept in its own alias so a permission error does not null out the facts above
+        parts.append(f'v{i}: repository({args}) {{ hasVulnerabilityAlertsEnabled }}')
+    return 'query {\n' + '\n'.join(parts) + '\n}'
+
+
+def extract_facts(repo, data, alerts):
+    facts = {}
+    if alerts is not None:
+        facts['vulnerability_alerts_enabled'] = alerts['hasVulnerabilityAlertsEnabled']
+    if data is None:
+        return facts
+
+    labels = [label['name'] for label in data['labels']['nodes'] if 'reproducible' in label['name'].lower()]
+    facts['reproducible_labels'] = labels
+
+    pull_requests = data['pullRequests']
+    facts['open_pull_requests'] = pull_requests['totalCount']
+    if pull_requests['nodes']:
+        requests = pull_requests['nodes'][0]['reviewRequests']['nodes']
+        facts['latest_pr_user_reviewers'] = sum(
+            1 for r in requests if (r.get('requestedReviewer') or {}).get('__typename') == 'User'
+        )
+
+    branch = data['defaultBranchRef']
+    if branch is None:
+        # Empty repository: leave everything else to the REST fallbacks
+        return facts
+    facts['default_branch'] = branch['name']
+    signature = (branch['target'] or {}).get('signature')
+    facts['last_commit_verified'] = bool(signature and signature['isValid'])
+
+    index = RepoFileIndex(repo, branch['name'])
+    # Only some directories are known; anything else is listed lazily through REST
+    index.truncated = True
+    listings = [data.get(f'd{i}') for i in range(len(PREFETCHED_DIRS))]
+    for directory, listing in zip(PREFETCHED_DIRS, listings):
+        if listing is None:
+            continue
+        entries = [{'path': e['name'], 'type': e['type'], 'sha': e['oid']} for e in listing['entries']]
+        index.add_listing(directory, entries)
+    facts['file_index'] = index
+
+    templates = listings[PREFETCHED_DIRS.index('.github/ISSUE_TEMPLATE')]
+    facts['issue_template_files'] = [e['name'] for e in templates['entries']] if templates else []
+    return facts
+
+
+def prefetch_repo_facts(repos, batch_size=BATCH_SIZE):
+    repos = [repo for repo in dict.fromkeys(repos) if '/' in repo]
+    fetched = 0
+    for start in range(0, len(repos), batch_size):
+        batch = repos[start:start + batch_size]
+        result = gh_graphql(build_batch_query(batch))
+        if not result.ok:
+            continue
+        data = (result.json() or {}).get('data') or {}
+        for i, repo in enumerate(batch):
+            facts = extract_facts(repo, data.get(f'r{i}'), data.get(f'v{i}'))
+            if facts:
+                set_repo_facts(repo, facts)
+                fetched += 1
+    return fetched
@@ -0,0 +1,107 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent on-disk cache of GitHub API responses, revalidated with conditional requests
+# Responses carrying an ETag or Last-Modified header are stored in SQLite; the next run sends
+# If-None-Match / If-Modified-Since and a 304 Not Modified (which GitHub does not count against
+# the primary rate limit) is answered from the stored body. The cache is size bounded and
+# evicts least recently used entries first.
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'dsomm')
+
+
+class CachedResponse:
+    def __init__(self, status, headers, body, etag, last_modified):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class HTTPCache:
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if path is None:
+            path = os.path.join(default_cache_dir(), 'http_cache.sqlite')
+        os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript('''
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+        ''')
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def lookup(self, key):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT status, headers, body, etag, last_modified FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, etag, last_modified = row
+        return CachedResponse(status, json.loads(headers), bytes(body), etag, last_modified)
+
+    def touch(self, key):
+        with self._lock:
+            self._db.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+
+    def store(self, key, status, headers, body):
+        etag = headers.get('etag')
+        last_modified = headers.get('last-modified')
+        if not etag and not last_modified:
+            return
+        size = len(body) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, status, json.dumps(headers), body, etag, last_modified, size, time.time())
+            )
+            self._size += size - (previous[0] if previous else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back under its size cap
+        while self._size > self.max_bytes:
+            rows = self._db.execute(
+                'SELECT key, size FROM responses ORDER BY last_used LIMIT 100'
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for key, size in rows:
+                self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._size -= size
+                if self._size <= self.max_bytes:
+                    return
+
+    def close(self):
+        with self._lock:
+            self._db.close()
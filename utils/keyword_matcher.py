@@ -0,0 +1,92 @@
+import hashlib
+import re
+import threading
+
+# Single-pass multi-keyword matching for workflow scanning
+# Checks register their keyword lists under a group name (usually the check name) when they are
+# imported. All registered keywords are compiled into one regex, so a text is scanned once for
+# every keyword of every check instead of once per keyword. The regex is a lookahead at each
+# position over the keywords sorted longest first, which finds the longest keyword starting at
+# every offset, overlapping matches included; keywords that are a prefix of a found keyword are
+# added from a precomputed prefix closure. Matching is on lowercased text, like the checks did.
+
+# Short texts (workflow names) are scanned by many checks; their scans are remembered
+MEMO_MAX_LENGTH = 256
+MEMO_MAX_ENTRIES = 10000
+
+
+class KeywordMatcher:
+    def __init__(self):
+        self._groups = {}       # group -> keywords, in registration order
+        self._version = 0
+        self._compiled = None   # (version, regex, prefix closure, signature)
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def signature(self):
+        # Identifies the registered keyword set, for caching scan results outside this process
+        return self._compile()[3]
+
+    def register(self, group, keywords):
+        keywords = [keyword.lower() for keyword in keywords]
+        with self._lock:
+            if self._groups.get(group) != keywords:
+                self._groups[group] = keywords
+                self._version += 1
+        return group
+
+    def _compile(self):
+        with self._lock:
+            if self._compiled is not None and self._compiled[0] == self._version:
+                return self._compiled
+            keywords = sorted({k for group in self._groups.values() for k in group if k}, key=lambda k: (-len(k), k))
+            regex = re.compile('(?=(' + '|'.join(re.escape(k) for k in keywords) + '))') if keywords else None
+            closure = {k: [other for other in keywords if k.startswith(other)] for k in keywords}
+            signature = hashlib.sha1('\n'.join(keywords).encode('utf-8')).hexdigest()[:16]
+            self._compiled = (self._version, regex, closure, signature)
+            self._memo = {}
+            return self._compiled
+
+    def scan(self, text):
+        # The set of registered keywords occurring in text (expected to be lowercased already)
+        version, regex, closure, _ = self._compile()
+        memoize = len(text) <= MEMO_MAX_LENGTH
+        if memoize:
+            found = self._memo.get(text)
+            if found is not None:
+                return found
+        found = set()
+        if regex is not None:
+            for match in regex.finditer(text):
+                keyword = match.group(1)
+                if keyword not in found:
+                    found.update(closure[keyword])
+        found = frozenset(found)
+        if memoize:
+            with self._lock:
+                if self._compiled[0] == version and len(self._memo) < MEMO_MAX_ENTRIES:
+                    self._memo[text] = found
+        return found
+
+    def matches(self, group, found):
+        # Keywords of one group within a scan result, in the group's order
+        return [keyword for keyword in self._groups.get(group, []) if keyword in found]
+
+    def find(self, group, text):
+        return self.matches(group, self.scan(text.lower()))
+
+
+workflow_keywords = KeywordMatcher()
+
+
+def register_keywords(group, keywords):
+    return workflow_keywords.register(group, keywords)
+
+
+def find_keywords(group, text):
+    return workflow_keywords.find(group, text)
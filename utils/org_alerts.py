@@ -0,0 +1,81 @@
+from collections import Counter
+
+from utils.github_api import gh_api, next_page_url
+from utils.repo_facts import repo_fact, set_repo_facts
+from utils.repo_metadata import get_repo_metadata
+
+# Org-wide security alert prefetch
+# When repos are enumerated from an org, the org-level alert endpoints are paged through once
+# per alert kind and the open alerts are counted per repository, instead of probing the
+# per-repo alert endpoints of every repo. A repo with open alerts of a kind evidently has that
+# feature enabled; the count is stored as a repo fact (utils/repo_facts.py). Repos without
+# alerts in the listing are left alone, since "enabled but clean" and "disabled" look the same
+# from the org listing. The org endpoints need org admin or security manager access; without it
+# nothing is prefetched.
+# For those repos, alerts_enabled() settles the question from the repo record's
+# security_and_analysis block, which the org listing and /repos/{repo} include for tokens with
+# admin access: secret scanning has its own status there; Dependabot alerts are enabled when
+# Dependabot security updates are (or when the GraphQL prefetch read the alert setting); code
+# scanning is unavailable on private repos without Advanced Security. Only what that leaves open
+# (no admin access, Dependabot without security updates, code scanning elsewhere) is probed per repo.
+
+ORG_ALERT_ENDPOINTS = {
+    'dependabot_alerts': '/orgs/{org}/dependabot/alerts?state=open&per_page=100',
+    'code_scanning_alerts': '/orgs/{org}/code-scanning/alerts?state=open&per_page=100',
+    'secret_scanning_alerts': '/orgs/{org}/secret-scanning/alerts?state=open&per_page=100',
+}
+
+
+def count_org_alerts(org, endpoint):
+    # Open alerts per repository full name, or None when the org listing is not readable
+    counts = Counter()
+    url = endpoint.format(org=org)
+    while url:
+        result = gh_api(url)
+        if not result.ok:
+            return None if url == endpoint.format(org=org) else counts
+        for alert in result.json():
+            repository = alert.get('repository') or {}
+            if repository.get('full_name'):
+                counts[repository['full_name']] += 1
+        url = next_page_url(result)
+    return counts
+
+
+def prefetch_org_alerts(orgs):
+    prefetched = 0
+    for org in dict.fromkeys(orgs):
+        for fact, endpoint in ORG_ALERT_ENDPOINTS.items():
+            counts = count_org_alerts(org, endpoint)
+            if counts is None:
+                continue
+            prefetched += 1
+            for repo, count in counts.items():
+                set_repo_facts(repo, {fact: count})
+    return prefetched
+
+
+def alerts_enabled(repo, fact):
+    # True / False when known without a request, None when only a per-repo probe can tell
+    if repo_fact(repo, fact):
+        return True
+    if fact == 'dependabot_alerts' and repo_fact(repo, 'vulnerability_alerts_enabled') is not None:
+        return repo_fact(repo, 'vulnerability_alerts_enabled')
+    metadata = get_repo_metadata(repo) or {}
+    security = metadata.get('security_and_analysis')
+    if not security:
+        return None
+    if fact == 'secret_scanning_alerts':
+        status = (security.get('secret_scanning') or {}).get('status')
+        return None if status is None else status == 'enabled'
+    if fact == 'dependabot_alerts':
+        return True if (security.get('dependabot_security_updates') or {}).get('status') == 'enabled' else None
+    if fact == 'code_scanning_alerts':
+        if metadata.get('private') and (security.get('advanced_security') or {}).get('status') == 'disabled':
+            return False
+    return None
+
+
+def alerts_readable(repo, fact, path):
+    enabled = alerts_enabled(repo, fact)
+    return gh_api(path).ok if enabled is None else enabled
@@ -0,0 +1,61 @@
+from utils.github_api import gh_api, next_page_url
+from utils.request_cache import RequestCache
+
+# Owner (user / organization) entities shared by all repos of a run
+# Many repos share one owner, so anything that only depends on the owner is looked up once per
+# run and fanned out to every repo of that owner, with concurrent lookups coalesced like the
+# per-repo request scope does. For organizations, one sweep over the members and outside
+# collaborators without two-factor authentication (filter=2fa_disabled) gives an MFA roster
+# covering everybody with access, not just the owner account. That filter is only available to
+# organization owners; without it the roster is unknown (None).
+
+_entities = RequestCache()
+
+
+def entity_memo(key, factory):
+    # Failed lookups (None) are not kept, so a later repo of the same owner tries again
+    return _entities.get_or_load(key, factory, cacheable=lambda value: value is not None)
+
+
+def clear_entities():
+    global _entities
+    _entities = RequestCache()
+
+
+def repo_owner(repo):
+    return repo.split('/')[0]
+
+
+def load_owner(owner):
+    result = gh_api(f'/users/{owner}')
+    return result.json() if result.ok else None
+
+
+def get_owner(owner):
+    # The /users/{owner} record, for users and organizations alike; None when not readable
+    return entity_memo(('owner', owner), lambda: load_owner(owner))
+
+
+def list_logins(path):
+    logins = []
+    url = path
+    while url:
+        result = gh_api(url)
+        if not result.ok:
+            return None
+        logins.extend(member['login'] for member in result.json())
+        url = next_page_url(result)
+    return logins
+
+
+def load_mfa_roster(org):
+    members = list_logins(f'/orgs/{org}/members?filter=2fa_disabled&per_page=100')
+    if members is None:
+        return None
+    collaborators = list_logins(f'/orgs/{org}/outside_collaborators?filter=2fa_disabled&per_page=100')
+    # Outside collaborators are None when their listing is not readable
+    return {'members_without_mfa': members, 'collaborators_without_mfa': collaborators}
+
+
+def get_mfa_roster(org):
+    return entity_memo(('mfa_roster', org), lambda: load_mfa_roster(org))
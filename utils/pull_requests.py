@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from utils.github_api import gh_api, gh_graphql, next_page_url
+from utils.request_cache import scoped_memo
+
+# Shared per-repo pull request dataset
+# Loaded once per repo scope, the first time a check asks for it, and shared by every PR-based
+# check. The pulls endpoint has no time filter (it ignores `since`), so pages are requested
+# newest-created first and paging stops once both the WINDOW_DAYS window and the latest
+# MIN_PULL_REQUESTS PRs are covered. Only the fields the checks use are kept.
+# Merges have their own view: a PR merged in the window may have been created long before it, so
+# closed PRs are paged by last update instead, which a merge always bumps. The pulls listing does
+# not include `merged_by`; it is looked up for the merged PRs only, MERGED_BY_BATCH at a time in
+# one GraphQL query, with the single PR endpoint as fallback.
+
+WINDOW_DAYS = 30
+MIN_PULL_REQUESTS = 100
+MERGED_BY_BATCH = 50
+
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def slim_pull_request(pr):
+    return {
+        'number': pr['number'],
+        'title': pr.get('title') or '',
+        'state': pr.get('state'),
+        'created_at': parse_timestamp(pr.get('created_at')),
+        'merged_at': parse_timestamp(pr.get('merged_at')),
+        'user_type': (pr.get('user') or {}).get('type'),
+        'requested_reviewers': len(pr.get('requested_reviewers') or []),
+    }
+
+
+class PullRequestDataset:
+    def __init__(self, pull_requests, complete, window_start):
+        self.pull_requests = pull_requests  # newest created first
+        self.complete = complete            # True when every PR of the repo was read
+        self.window_start = window_start
+
+    def latest(self, count=MIN_PULL_REQUESTS):
+        return self.pull_requests[:count]
+
+    def created_in_window(self):
+        return [pr for pr in self.pull_requests if pr['created_at'] and pr['created_at'] >= self.window_start]
+
+    def latest_open(self):
+        return next((pr for pr in self.pull_requests if pr['state'] == 'open'), None)
+
+
+def load_pull_requests(repo, window_days=WINDOW_DAYS, min_count=MIN_PULL_REQUESTS):
+    window_start = datetime.now(timezone.utc) - timedelta(days=window_days)
+    url = f'/repos/{repo}/pulls?state=all&sort=created&direction=desc&per_page=100'
+    pull_requests = []
+    while url:
+        result = gh_api(url)
+        if not result.ok:
+            # Without the first page there is no dataset; a later failed page just ends it early
+            return PullRequestDataset(pull_requests, False, window_start) if pull_requests else None
+        pull_requests.extend(slim_pull_request(pr) for pr in result.json())
+        oldest = pull_requests[-1]['created_at'] if pull_requests else None
+        if len(pull_requests) >= min_count and oldest is not None and oldest < window_start:
+            return PullRequestDataset(pull_requests, False, window_start)
+        url = next_page_url(result)
+    return PullRequestDataset(pull_requests, True, window_start)
+
+
+def get_pull_requests(repo):
+    # None when the pulls endpoint is not readable
+    return scoped_memo(('pull_requests', repo), lambda: load_pull_requests(repo))
+
+
+def merged_by_query(repo, numbers):
+    owner, _, name = repo.partition('/')
+    fields = ' '.join(f'p{number}: pullRequest(number: {number}) {{ mergedBy {{ __typename }} }}' for number in numbers)
+    return f'query {{ repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {fields} }} }}'
+
+
+def resolve_merged_by(repo, pull_requests):
+    # Sets 'merged_by_type' ('Bot', 'User', ...) on each PR; None when it could not be read
+    for start in range(0, len(pull_requests), MERGED_BY_BATCH):
+        batch = pull_requests[start:start + MERGED_BY_BATCH]
+        result = gh_graphql(merged_by_query(repo, [pr['number'] for pr in batch]))
+        data = ((result.json() or {}).get('data') or {}).get('repository') if result.ok else None
+        for pr in batch:
+            node = (data or {}).get(f"p{pr['number']}")
+            if node is not None:
+                pr['merged_by_type'] = (node.get('mergedBy') or {}).get('__typename')
+                continue
+            detail = gh_api(f"/repos/{repo}/pulls/{pr['number']}")
+            pr['merged_by_type'] = (detail.json().get('merged_by') or {}).get('type') if detail.ok else None
+
+
+def load_merged_pull_requests(repo, window_days=WINDOW_DAYS):
+    # PRs merged in the window, most recently updated first; None when the pulls endpoint is not readable
+    window_start = datetime.now(timezone.utc) - timedelta(days=window_days)
+    url = f'/repos/{repo}/pulls?state=closed&sort=updated&direction=desc&per_page=100'
+    merged = []
+    first_page = True
+    while url:
+        result = gh_api(url)
+        if not result.ok:
+            if first_page:
+                return None
+            break
+        first_page = False
+        page = result.json()
+        for pr in page:
+            merged_at = parse_timestamp(pr.get('merged_at'))
+            if merged_at and merged_at >= window_start:
+                merged.append(slim_pull_request(pr))
+        # Merging updates a PR, so nothing updated before the window was merged in it
+        oldest = parse_timestamp(page[-1].get('updated_at')) if page else None
+        if oldest is None or oldest < window_start:
+            break
+        url = next_page_url(result)
+    resolve_merged_by(repo, merged)
+    return merged
+
+
+def get_merged_pull_requests(repo):
+    return scoped_memo(('merged_pull_requests', repo), lambda: load_merged_pull_requests(repo))
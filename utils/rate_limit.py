@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from utils import deadlines
+
+# Rate-limit-aware request scheduling
+# Tracks the budget GitHub reports for each rate limit resource (core, search, graphql, ...)
+# through the X-RateLimit-* headers, per credential. While the budget is comfortable requests go
+# out immediately; once it drops below PACING_THRESHOLD of the limit, the remaining requests are
+# spread evenly over the time left until the reset. Exhausted budgets and secondary rate limits
+# (any 429, and 403 with Retry-After or a "secondary rate limit" message) pause requests and are retried
+# instead of surfacing as failed checks. Pauses longer than the time left before the current
+# deadline (utils/deadlines.py) end the request with DeadlineExceeded right away. A request that
+# is still rate limited after max_retries raises RateLimitExceeded inside a check (a BaseException
+# like DeadlineExceeded), so the check is reported as unable to check rather than judging the
+# throttled response.
+
+PACING_THRESHOLD = 0.2
+SECONDARY_BACKOFF = 60
+MAX_BACKOFF = 15 * 60
+MAX_RETRIES = 5
+
+
+class RateLimitExceeded(BaseException):
+    pass
+
+
+class _Bucket:
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.next_slot = 0.0
+
+
+def resource_for(url):
+    path = urlsplit(url).path
+    if path.endswith('/graphql'):
+        return 'graphql'
+    if '/search/code' in path:
+        return 'code_search'
+    if '/search/' in path:
+        return 'search'
+    return 'core'
+
+
+class RateLimitScheduler:
+    def __init__(self, max_retries=MAX_RETRIES, clock=time.time, sleep=deadlines.sleep):
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets = {}
+        self._pause_until = {}
+        self._secondary_strikes = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, credential, resource):
+        return self._buckets.setdefault((credential, resource), _Bucket())
+
+    def remaining(self, resource='core', credential='default'):
+        with self._lock:
+            bucket = self._buckets.get((credential, resource))
+            return None if bucket is None else bucket.remaining
+
+    def budget(self, resource='core', credential='default'):
+        # (remaining, limit) as last reported, (None, None) before the first response
+        with self._lock:
+            bucket = self._buckets.get((credential, resource))
+            return (None, None) if bucket is None else (bucket.remaining, bucket.limit)
+
+    def wait_time(self, resource='core', credential='default'):
+        # Seconds a request with this credential would wait before going out
+        with self._lock:
+            now = self.clock()
+            wait = max(0.0, self._pause_until.get(credential, 0.0) - now)
+            bucket = self._buckets.get((credential, resource))
+            if bucket is not None and bucket.remaining is not None and bucket.reset is not None and bucket.reset > now:
+                if bucket.remaining <= 0:
+                    wait = max(wait, bucket.reset - now + 1)
+                elif bucket.limit and bucket.remaining < bucket.limit * PACING_THRESHOLD:
+                    wait = max(wait, bucket.next_slot - now)
+            return wait
+
+    def before_request(self, resource, credential='default'):
+        with self._lock:
+            now = self.clock()
+            wait = max(0.0, self._pause_until.get(credential, 0.0) - now)
+            bucket = self._bucket(credential, resource)
+            if bucket.remaining is not None and bucket.reset is not None and bucket.reset > now:
+                if bucket.remaining <= 0:
+                    wait = max(wait, bucket.reset - now + 1)
+                elif bucket.limit and bucket.remaining < bucket.limit * PACING_THRESHOLD:
+                    # Spread what is left of the budget over the rest of the window
+                    interval = (bucket.reset - now) / bucket.remaining
+                    slot = max(now + wait, bucket.next_slot)
+                    bucket.next_slot = slot + interval
+                    wait = slot - now
+                # Count the request against the budget until the response reports the real value
+                bucket.remaining -= 1
+        if wait > 0:
+            self.sleep(wait)
+
+    def after_response(self, resource, response, credential='default'):
+        # Returns the number of seconds to wait before retrying, or None if the response stands
+        headers = response.headers
+        with self._lock:
+            now = self.clock()
+            bucket = self._bucket(credential, headers.get('x-ratelimit-resource', resource))
+            if 'x-ratelimit-remaining' in headers:
+                bucket.remaining = int(headers['x-ratelimit-remaining'])
+                bucket.limit = int(headers.get('x-ratelimit-limit', bucket.limit or 0)) or bucket.limit
+                bucket.reset = float(headers.get('x-ratelimit-reset', bucket.reset or 0)) or bucket.reset
+
+            if response.status not in (403, 429):
+                self._secondary_strikes.pop(credential, None)
+                return None
+
+            # A 429 is always a rate limit, even without Retry-After or the usual message
+            if response.status == 429 or 'retry-after' in headers or 'secondary rate limit' in response.reason().lower():
+                strikes = self._secondary_strikes.get(credential, 0) + 1
+                self._secondary_strikes[credential] = strikes
+                if 'retry-after' in headers:
+                    delay = float(headers['retry-after'])
+                else:
+                    delay = min(SECONDARY_BACKOFF * 2 ** (strikes - 1), MAX_BACKOFF)
+            elif bucket.remaining == 0 and bucket.reset:
+                delay = max(bucket.reset - now, 0) + 1
+            else:
+                # A plain permission error, not a rate limit
+                return None
+
+            self._pause_until[credential] = max(self._pause_until.get(credential, 0.0), now + delay)
+        source = resource if credential == 'default' else f"{resource}, {credential}"
+        print(f"GitHub rate limit hit ({source}, HTTP {response.status}); pausing requests for {delay:.0f}s",
+              file=sys.stderr)
+        return delay
@@ -0,0 +1,23 @@
+import threading
+
+# Repo-level facts prefetched in bulk (e.g. by the GraphQL batch backend) for the whole run
+# Checks read them with repo_fact(); None means "not prefetched" and the check should fall back
+# to its own REST calls.
+
+_facts = {}
+_facts_lock = threading.Lock()
+
+
+def repo_fact(repo, name):
+    with _facts_lock:
+        return _facts.get(repo, {}).get(name)
+
+
+def set_repo_facts(repo, facts):
+    with _facts_lock:
+        _facts.setdefault(repo, {}).update(facts)
+
+
+def clear_repo_facts():
+    with _facts_lock:
+        _facts.clear()
@@ -0,0 +1,143 @@
+import base64
+import threading
+
+from utils.blob_cache import cached_blob_artifact
+from utils.github_api import gh_api
+from utils.repo_facts import repo_fact
+from utils.repo_metadata import get_repo_metadata
+from utils.request_cache import current_cache, scoped_memo
+
+# Per-repo file index answering "does this path exist?" probes
+# Built from one recursive git tree fetch of the default branch instead of one /contents/{file}
+# request per probe. On huge repos (e.g. chromium/chromium) GitHub truncates the recursive
+# tree; the entries it did return are still trusted, and any directory needed to answer a
+# negative lookup is then listed on demand, one non-recursive subtree fetch per directory.
+
+
+class RepoFileIndex:
+    def __init__(self, repo, ref):
+        self.repo = repo
+        self.ref = ref
+        self.truncated = False
+        self._entries = {}      # path -> (type, sha)
+        self._listed = set()    # directories whose full listing is in _entries ('' is the root)
+        self._lock = threading.Lock()
+
+    def add_tree(self, prefix, tree):
+        for item in tree:
+            path = f"{prefix}/{item['path']}" if prefix else item['path']
+            self._entries[path] = (item['type'], item.get('sha'))
+
+    def add_listing(self, directory, tree):
+        # A complete, non-recursive listing of one directory
+        self.add_tree(directory, tree)
+        self._listed.add(directory)
+
+    def mark_complete(self):
+        # Every directory is fully listed once a non-truncated recursive tree has been added
+        self._listed.add('')
+        self._listed.update(path for path, (kind, _) in self._entries.items() if kind == 'tree')
+
+    def entry(self, path):
+        path = path.strip('/')
+        found = self._entries.get(path)
+        if found is not None or not self.truncated:
+            return found
+
+        parent = path.rpartition('/')[0]
+        with self._lock:
+            if not self._ensure_listed(parent):
+                return None
+        return self._entries.get(path)
+
+    def exists(self, path):
+        return self.entry(path) is not None
+
+    def sha(self, path):
+        found = self.entry(path)
+        return found[1] if found else None
+
+    def _ensure_listed(self, directory):
+        if directory in self._listed:
+            return True
+        if directory:
+            parent = directory.rpartition('/')[0]
+            if not self._ensure_listed(parent):
+                return False
+            found = self._entries.get(directory)
+            if found is None or found[0] != 'tree':
+                # The parent is fully listed and has no such subdirectory
+                self._listed.add(directory)
+                return True
+            tree_ref = found[1]
+        else:
+            tree_ref = self.ref
+
+        result = gh_api(f'/repos/{self.repo}/git/trees/{tree_ref}')
+        if not result.ok:
+            return False
+        self.add_listing(directory, result.json().get('tree', []))
+        return True
+
+
+def build_file_index(repo):
+    prefetched = repo_fact(repo, 'file_index')
+    if prefetched is not None:
+        return prefetched
+
+    repo_data = get_repo_metadata(repo)
+    default_branch = repo_fact(repo, 'default_branch') or (repo_data or {}).get('default_branch')
+    if not default_branch:
+        return None
+
+    index = RepoFileIndex(repo, default_branch)
+    tree_result = gh_api(f'/repos/{repo}/git/trees/{default_branch}?recursive=1')
+    if tree_result.status == 409:
+        # Empty repository: there are no files to find
+        index.mark_complete()
+        return index
+    if not tree_result.ok:
+        return None
+
+    tree = tree_result.json()
+    index.add_tree('', tree.get('tree', []))
+    index.truncated = bool(tree.get('truncated'))
+    if not index.truncated:
+        index.mark_complete()
+    return index
+
+
+def get_file_index(repo):
+    return scoped_memo(('file_index', repo), lambda: build_file_index(repo))
+
+
+def repo_file_exists(repo, path):
+    # Outside a request scope the index would be rebuilt on every call, so probe the path directly
+    index = get_file_index(repo) if current_cache() is not None else None
+    if index is None:
+        # Tree not readable (permissions, unknown ref): fall back to probing the single path
+        return gh_api(f'/repos/{repo}/contents/{path}').ok
+    return index.exists(path)
+
+
+def repo_file_sha(repo, path):
+    # Blob sha of a file from the per-repo index; None when unknown (no scope, no index, no file)
+    index = get_file_index(repo) if current_cache() is not None else None
+    return index.sha(path) if index is not None else None
+
+
+def decode_content(data):
+    # Decode the content of a /git/blobs/ or /contents/ response
+    if not data or 'content' not in data:
+        return None
+    if data.get('encoding', 'base64') != 'base64':
+        return data['content']
+    return base64.b64decode(data['content']).decode('utf-8', errors='replace')
+
+
+def fetch_blob_text(repo, sha):
+    # Blobs are immutable: their text is kept in the content-addressed blob cache across repos and runs
+    def load():
+        result = gh_api(f'/repos/{repo}/git/blobs/{sha}')
+        return decode_content(result.json()) if result.ok else None
+    return cached_blob_artifact(sha, 'text', load)
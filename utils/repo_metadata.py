@@ -0,0 +1,20 @@
+from utils.github_api import gh_api
+from utils.repo_facts import repo_fact
+from utils.request_cache import scoped_memo
+
+# The /repos/{repo} record, fetched at most once per repo
+# Org enumeration (utils/get_repos_from_org.py) already returns this record for every repo and
+# seeds it as the 'metadata' repo fact; otherwise it is fetched once per repo scope.
+
+
+def load_repo_metadata(repo):
+    result = gh_api(f'/repos/{repo}')
+    return result.json() if result.ok else None
+
+
+def get_repo_metadata(repo):
+    # None when the repository is not readable
+    seeded = repo_fact(repo, 'metadata')
+    if seeded is not None:
+        return seeded
+    return scoped_memo(('repo_metadata', repo), lambda: load_repo_metadata(repo))
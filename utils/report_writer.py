@@ -0,0 +1,74 @@
+import csv
+import json
+
+# Streaming, repo-per-row report writer
+# Each repo is written (and flushed) as soon as its checks finish, so results can be piped
+# into other tools while the scan is still running. Only one repo's results are held at a time;
+# level and total scores across all repos are kept as running sums and written as a final
+# summary row (CSV) or summary record (JSONL) by close().
+
+
+class StreamingReportWriter:
+    def __init__(self, out, output_format, checks, levels):
+        self.out = out
+        self.output_format = output_format
+        self.checks = list(checks)
+        self.levels = list(levels)
+        self.repo_count = 0
+        self.level_totals = {level: {'total': 0, 'successful': 0} for level in self.levels}
+        self.overall_totals = {'total': 0, 'successful': 0}
+        self._csv = None
+        if output_format == 'csv':
+            self._csv = csv.writer(out)
+            self._csv.writerow(
+                ["Repository"] + self.checks + [f"{level} Score" for level in self.levels] + ["Total Score"]
+            )
+            out.flush()
+
+    def write(self, repo, results, level_stats, total_stats):
+        self.repo_count += 1
+        for level in self.levels:
+            add_stats(self.level_totals[level], level_stats.get(level))
+        add_stats(self.overall_totals, total_stats)
+
+        scores = {level: format_score(level_stats.get(level)) for level in self.levels}
+        total = format_score(total_stats)
+        if self._csv is not None:
+            self._csv.writerow(
+                [repo] + [str(results.get(check, "")) for check in self.checks]
+                + [scores[level] for level in self.levels] + [total]
+            )
+        else:
+            record = {
+                'repo': repo,
+                'results': {check: str(results.get(check, "")) for check in self.checks},
+                'scores': scores,
+                'total': total,
+            }
+            self.out.write(json.dumps(record) + '\n')
+        self.out.flush()
+
+    def close(self):
+        scores = {level: format_score(self.level_totals[level]) for level in self.levels}
+        total = format_score(self.overall_totals)
+        if self._csv is not None:
+            self._csv.writerow(
+                [f"All repositories ({self.repo_count})"] + [""] * len(self.checks)
+                + [scores[level] for level in self.levels] + [total]
+            )
+        else:
+            summary = {'repos': self.repo_count, 'scores': scores, 'total': total}
+            self.out.write(json.dumps({'summary': summary}) + '\n')
+        self.out.flush()
+
+
+def add_stats(target, stats):
+    if stats:
+        target['total'] += stats['total']
+        target['successful'] += stats['successful']
+
+
+def format_score(stats):
+    if not stats or stats['total'] == 0:
+        return ""
+    return f"{stats['successful']}/{stats['total']}"
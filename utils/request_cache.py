@@ -0,0 +1,91 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from utils.deadlines import DeadlineExceeded, RequestTimeout, check_deadline, note_request_timeout, remaining
+
+# Run-scoped memoization shared by all checks of one repository
+# Entries live for the duration of a request_scope() (one check_repo_security_features call).
+# Concurrent callers asking for the same key wait for the first caller's fetch instead of
+# issuing their own (in-flight coalescing). Waiters give up at their own deadline, and a load
+# that ran out of its owner's time is retried by the next waiter instead of failing it too. A
+# request that hit its own timeout is not retried; its waiters time out with it.
+
+_current_cache = contextvars.ContextVar('request_cache', default=None)
+
+
+class _Entry:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class RequestCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader, cacheable=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            while not entry.done.wait(remaining()):
+                check_deadline()
+            if isinstance(entry.error, RequestTimeout):
+                # The shared request timed out; the waiting check did not get its answer either
+                note_request_timeout()
+                raise entry.error
+            if isinstance(entry.error, DeadlineExceeded):
+                return self.get_or_load(key, loader, cacheable)
+            if entry.error is not None:
+                raise entry.error
+            return entry.value
+
+        try:
+            entry.value = loader()
+        except BaseException as e:
+            entry.error = e
+            self._forget(key)
+            raise
+        finally:
+            entry.done.set()
+
+        if cacheable is not None and not cacheable(entry.value):
+            self._forget(key)
+        return entry.value
+
+    def _forget(self, key):
+        # Waiters already holding the entry still get its result; later callers refetch
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+def current_cache():
+    return _current_cache.get()
+
+
+@contextmanager
+def request_scope(cache=None):
+    # Pass an existing cache to let several threads work inside the same scope
+    token = _current_cache.set(cache if cache is not None else RequestCache())
+    try:
+        yield _current_cache.get()
+    finally:
+        _current_cache.reset(token)
+
+
+def scoped_memo(key, factory):
+    cache = current_cache()
+    if cache is None:
+        return factory()
+    return cache.get_or_load(key, factory)
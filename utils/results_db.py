@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils.http_cache import default_cache_dir
+
+# Historical results store
+# Every run is appended to a SQLite database, one row per (run, repo, check) with the check's
+# level, its result text, status code and metric, and whether it passed (NULL for checks that
+# are not scored), so trends, regressions and pass rates are answered with indexed queries
+# instead of re-reading old CSV files.
+
+class ResultsDB:
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(default_cache_dir(), 'results.sqlite')
+        os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript('''
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                repo_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                repo TEXT NOT NULL,
+                check_name TEXT NOT NULL,
+                level TEXT NOT NULL,
+                result TEXT NOT NULL,
+                successful INTEGER,
+                status INTEGER,
+                metric REAL,
+                PRIMARY KEY (run_id, repo, check_name)
+            );
+            CREATE INDEX IF NOT EXISTS results_repo ON results (repo, run_id);
+            CREATE INDEX IF NOT EXISTS results_check ON results (check_name, run_id);
+            CREATE INDEX IF NOT EXISTS results_level ON results (level, run_id);
+        ''')
+
+    def start_run(self):
+        with self._lock:
+            cursor = self._db.execute('INSERT INTO runs (started_at) VALUES (?)', (time.time(),))
+            self._db.commit()
+            return cursor.lastrowid
+
+    def record_repo(self, run_id, repo, rows):
+        # rows: (check, level, CheckResult, successful or None)
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO results (run_id, repo, check_name, level, result, successful, status, metric) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, repo, check, level, str(result), successful, int(result.status), result.metric)
+                 for check, level, result, successful in rows]
+            )
+            self._db.execute('UPDATE runs SET repo_count = repo_count + 1 WHERE id = ?', (run_id,))
+            self._db.commit()
+
+    def finish_run(self, run_id):
+        with self._lock:
+            self._db.execute('UPDATE runs SET finished_at = ? WHERE id = ?', (time.time(), run_id))
+            self._db.commit()
+
+    def latest_runs(self, count):
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT id FROM runs WHERE repo_count > 0 ORDER BY id DESC LIMIT ?', (count,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def level_trends(self, limit=30, repo_prefix=None):
+        # (run id, started_at, level, successful, total) for the last `limit` runs
+        run_ids = self.latest_runs(limit)
+        if not run_ids:
+            return []
+        query = '''
+            SELECT r.run_id, runs.started_at, r.level, SUM(r.successful), COUNT(r.successful)
+            FROM results r JOIN runs ON runs.id = r.run_id
+            WHERE r.run_id >= ? AND r.successful IS NOT NULL'''
+        params = [min(run_ids)]
+        if repo_prefix:
+            query += ' AND substr(r.repo, 1, ?) = ?'
+            params.extend([len(repo_prefix), repo_prefix])
+        query += ' GROUP BY r.run_id, r.level ORDER BY r.run_id, r.level'
+        with self._lock:
+            return self._db.execute(query, params).fetchall()
+
+    def regressions(self, repo_prefix=None):
+        # Checks that passed in the previous run and fail in the latest one: (repo, check, level, before, now)
+        run_ids = self.latest_runs(2)
+        if len(run_ids) < 2:
+            return []
+        query = '''
+            SELECT cur.repo, cur.check_name, cur.level, prev.result, cur.result
+            FROM results cur
+            JOIN results prev ON prev.run_id = ? AND prev.repo = cur.repo AND prev.check_name = cur.check_name
+            WHERE cur.run_id = ? AND prev.successful = 1 AND cur.successful = 0'''
+        params = [run_ids[1], run_ids[0]]
+        if repo_prefix:
+            query += ' AND substr(cur.repo, 1, ?) = ?'
+            params.extend([len(repo_prefix), repo_prefix])
+        query += ' ORDER BY cur.repo, cur.level, cur.check_name'
+        with self._lock:
+            return self._db.execute(query, params).fetchall()
+
+    def pass_rates(self, repo_prefix=None):
+        # Per check in the latest run: (level, check, successful, total)
+        run_ids = self.latest_runs(1)
+        if not run_ids:
+            return []
+        query = '''
+            SELECT level, check_name, SUM(successful), COUNT(successful)
+            FROM results
+            WHERE run_id = ? AND successful IS NOT NULL'''
+        params = [run_ids[0]]
+        if repo_prefix:
+            query += ' AND substr(repo, 1, ?) = ?'
+            params.extend([len(repo_prefix), repo_prefix])
+        query += ' GROUP BY level, check_name ORDER BY level, check_name'
+        with self._lock:
+            return self._db.execute(query, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
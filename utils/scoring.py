@@ -0,0 +1,142 @@
+import numpy as np
+import yaml
+
+from utils.check_result import Status
+
+# Vectorized scorecard over many repos
+# Results are held as a status matrix (repos x checks, one uint8 status code per cell) next to
+# boolean level masks over the check columns derived from dsomm_checks.yaml. Level and total
+# scores, percentiles, per-check pass rates and team rollups are then whole-matrix reductions
+# instead of Python loops over every cell, and a cell costs one byte however many repos are added.
+
+PERCENTILES = [10, 25, 50, 75, 90]
+INITIAL_ROWS = 256
+
+
+class StatusMatrix:
+    def __init__(self, check_levels, checks):
+        self.checks = list(checks)
+        catalogue = {check['name']: (level, check.get('supported', False))
+                     for level, level_checks in check_levels.items() for check in level_checks}
+        check_level = np.array([catalogue.get(check, ("Unknown", False))[0] for check in self.checks], dtype=object)
+        # Columns that count towards the scores
+        self.supported = np.array([catalogue.get(check, ("Unknown", False))[1] for check in self.checks], dtype=bool)
+        masks = {level: self.supported & (check_level == level) for level in check_levels}
+        self.levels = [level for level, mask in masks.items() if mask.any()]
+        # checks x levels, True where a supported check belongs to the level
+        self.level_masks = np.zeros((len(self.checks), len(self.levels)), dtype=bool)
+        for i, level in enumerate(self.levels):
+            self.level_masks[:, i] = masks[level]
+        self.repos = []
+        self._statuses = np.zeros((INITIAL_ROWS, len(self.checks)), dtype=np.uint8)
+
+    def add(self, repo, results):
+        row = len(self.repos)
+        if row == len(self._statuses):
+            # Grow by doubling, so adding n repos copies O(n) cells overall
+            grown = np.zeros((2 * row, len(self.checks)), dtype=np.uint8)
+            grown[:row] = self._statuses
+            self._statuses = grown
+        self._statuses[row] = [results[check].status if check in results else Status.NOT_SUPPORTED
+                               for check in self.checks]
+        self.repos.append(repo)
+
+    def collect(self, repo_results):
+        # Adds each repo's results as they pass through, like the history recorder
+        for repo, results in repo_results:
+            self.add(repo, results)
+            yield repo, results
+
+    @property
+    def statuses(self):
+        return self._statuses[:len(self.repos)]
+
+    def passed(self):
+        return self.statuses == Status.PASSED
+
+    def level_scores(self):
+        # (repos x levels successful counts, checks per level)
+        return self.passed().astype(np.int32) @ self.level_masks.astype(np.int32), self.level_masks.sum(axis=0)
+
+    def total_scores(self):
+        # (successful count per repo, supported checks)
+        return self.passed()[:, self.supported].sum(axis=1), int(self.supported.sum())
+
+    def score_fractions(self):
+        # Per level and in total, the fraction of supported checks each repo passes
+        level_scores, level_totals = self.level_scores()
+        fractions = {level: level_scores[:, i] / level_totals[i] for i, level in enumerate(self.levels)}
+        total_scores, total = self.total_scores()
+        if total:
+            fractions['Total'] = total_scores / total
+        return fractions
+
+    def percentiles(self, q=PERCENTILES):
+        if not self.repos:
+            return {}
+        return {name: np.percentile(values, q) for name, values in self.score_fractions().items()}
+
+    def status_counts(self):
+        # checks x statuses, how many repos ended in each status per check
+        statuses = self.statuses
+        return np.stack([(statuses == status).sum(axis=0) for status in Status], axis=1)
+
+    def rollup(self, groups):
+        # groups: one label per repo. Returns (labels, repo counts, level score sums, total score sums)
+        labels, index = np.unique(np.asarray(groups, dtype=object), return_inverse=True)
+        level_scores, _ = self.level_scores()
+        total_scores, _ = self.total_scores()
+        level_sums = np.zeros((len(labels), len(self.levels)), dtype=np.int64)
+        np.add.at(level_sums, index, level_scores)
+        return labels, np.bincount(index, minlength=len(labels)), level_sums, np.bincount(index, weights=total_scores, minlength=len(labels))
+
+
+def load_teams(path):
+    # YAML mapping of team name to its repositories; returns repo -> team
+    with open(path, 'r') as f:
+        teams = yaml.safe_load(f) or {}
+    return {repo: team for team, repos in teams.items() for repo in repos or []}
+
+
+def format_fraction(successful, total):
+    return f"{successful}/{total}" if total else ""
+
+
+def rollup_records(matrix, groups):
+    labels, counts, level_sums, total_sums = matrix.rollup(groups)
+    _, level_totals = matrix.level_scores()
+    _, total = matrix.total_scores()
+    records = {}
+    for i, label in enumerate(labels):
+        records[label] = {
+            'repos': int(counts[i]),
+            'scores': {level: format_fraction(int(level_sums[i, j]), int(level_totals[j] * counts[i]))
+                       for j, level in enumerate(matrix.levels)},
+            'total': format_fraction(int(total_sums[i]), int(total * counts[i])),
+        }
+    return records
+
+
+def build_scorecard(matrix, teams=None):
+    # JSON-ready scorecard: score percentiles, per-check pass rates and owner / team rollups
+    repo_count = len(matrix.repos)
+    passed = matrix.passed().sum(axis=0)
+    counts = matrix.status_counts()
+    checks = {}
+    for i, check in enumerate(matrix.checks):
+        if not matrix.supported[i]:
+            continue
+        checks[check] = {
+            'pass_rate': float(passed[i] / repo_count) if repo_count else None,
+            'statuses': {status.name.lower(): int(counts[i, j]) for j, status in enumerate(Status) if counts[i, j]},
+        }
+    scorecard = {
+        'repos': repo_count,
+        'percentiles': {name: dict(zip(map(str, PERCENTILES), values.round(4).tolist()))
+                        for name, values in matrix.percentiles().items()},
+        'checks': checks,
+        'owners': rollup_records(matrix, [repo.split('/')[0] for repo in matrix.repos]),
+    }
+    if teams is not None:
+        scorecard['teams'] = rollup_records(matrix, [teams.get(repo, "(no team)") for repo in matrix.repos])
+    return scorecard
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.check_result import CheckResult, Status
+from utils.github_api import gh_api
+from utils.http_cache import default_cache_dir
+from utils.repo_metadata import get_repo_metadata
+from utils.request_cache import scoped_memo
+
+# Local state for incremental runs
+# The last result of every check x repo cell is stored together with the repo signals it was
+# computed from. A check declares which signals invalidate it through module constants:
+#   INVALIDATED_BY - any of 'push' (pushed_at), 'settings' (fingerprint of the repo settings)
+#                    and 'activity' (last update of any issue or pull request)
+#   TTL            - seconds after which the result is recomputed regardless of the signals,
+#                    for checks over time windows or state no signal covers (alerts, owners)
+# On a rerun a cell is reused while its signals are unchanged and it is younger than its TTL;
+# only stale cells are evaluated again. Failed evaluations (unable to check, errors, timeouts)
+# are never stored. Results are stored as JSON records of their CheckResult fields.
+
+SIGNALS = ['push', 'settings', 'activity']
+DEFAULT_TTL = 24 * 60 * 60
+
+# Repo settings that make up the 'settings' signal. Only fields that the org listing's minimal
+# repository records carry too, so a repo seeded by --org fingerprints the same as one fetched from
+# /repos/{repo}; merge settings (allow_*_merge, delete_branch_on_merge) are in the full record only.
+SETTINGS_FIELDS = [
+    'default_branch', 'visibility', 'private', 'archived', 'has_issues', 'has_projects', 'has_wiki',
+    'security_and_analysis', 'topics',
+]
+
+TRANSIENT_STATUSES = {Status.UNABLE_TO_CHECK, Status.ERROR, Status.TIMED_OUT}
+
+
+def settings_fingerprint(metadata):
+    settings = {field: metadata.get(field) for field in SETTINGS_FIELDS}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def latest_activity(repo):
+    # The issues endpoint lists pull requests too, so its most recently updated entry marks any activity
+    result = gh_api(f'/repos/{repo}/issues?state=all&sort=updated&direction=desc&per_page=1')
+    if not result.ok:
+        return None
+    items = result.json()
+    return items[0].get('updated_at') if items else ''
+
+
+def load_signal(repo, name):
+    if name == 'activity':
+        return latest_activity(repo)
+    metadata = get_repo_metadata(repo)
+    if metadata is None:
+        return None
+    if name == 'push':
+        return metadata.get('pushed_at') or ''
+    if name == 'settings':
+        return settings_fingerprint(metadata)
+    return None
+
+
+def repo_signal(repo, name):
+    # None when the signal could not be read; the cell is then treated as stale
+    return scoped_memo(('repo_signal', repo, name), lambda: load_signal(repo, name))
+
+
+class StateStore:
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(default_cache_dir(), 'state.sqlite')
+        os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+        self.path = path
+        self.reused = 0
+        self.evaluated = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript('''
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS check_state (
+                repo TEXT NOT NULL,
+                check_name TEXT NOT NULL,
+                result TEXT NOT NULL,
+                signals TEXT NOT NULL,
+                evaluated_at REAL NOT NULL,
+                PRIMARY KEY (repo, check_name)
+            );
+        ''')
+
+    def lookup(self, repo, check):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT result, signals, evaluated_at FROM check_state WHERE repo = ? AND check_name = ?',
+                (repo, check)
+            ).fetchone()
+        if row is None:
+            return None
+        return CheckResult.from_dict(json.loads(row[0])), json.loads(row[1]), row[2]
+
+    def save(self, repo, check, result, signals):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO check_state VALUES (?, ?, ?, ?, ?)',
+                (repo, check, json.dumps(result.to_dict()), json.dumps(signals, sort_keys=True), time.time())
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class IncrementalRunner:
+    # Drop-in replacement for run_check(repo, check) that reuses fresh cells from a StateStore.
+    # invalidation(check) returns the check's (signal names, ttl), or None to always evaluate it
+    def __init__(self, store, run_check, invalidation):
+        self.store = store
+        self.run_check = run_check
+        self.invalidation = invalidation
+        self._lock = threading.Lock()
+
+    def __call__(self, repo, check):
+        declared = self.invalidation(check)
+        if declared is None:
+            return self.run_check(repo, check)
+        names, ttl = declared
+
+        signals = {name: repo_signal(repo, name) for name in names}
+        known = all(value is not None for value in signals.values())
+        state = self.store.lookup(repo, check)
+        if known and state is not None:
+            result, stored_signals, evaluated_at = state
+            if stored_signals == signals and (ttl is None or time.time() - evaluated_at < ttl):
+                with self._lock:
+                    self.store.reused += 1
+                return result
+
+        result = self.run_check(repo, check)
+        with self._lock:
+            self.store.evaluated += 1
+        if known and result.status not in TRANSIENT_STATUSES:
+            self.store.save(repo, check, result, signals)
+        return result
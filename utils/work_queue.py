@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from utils.check_result import CheckResult, error
+
+# Durable repo x check work queue for spreading one assessment over several worker processes
+# One SQLite file holds every (repo, check) work item with its shard, state, lease and result.
+# Repos are sharded deterministically by a hash of their name, and all checks of a repo share a
+# shard so a worker can evaluate them in one request scope. A worker claims a batch of repos
+# from its own shard; once that shard is drained it steals from the end of the shard with the
+# most work left. Claims are leases: items of a worker that stopped are claimed again once
+# their lease expires, and items that failed MAX_ATTEMPTS claims are recorded as errors. The
+# merge step reads the results back in the order the repos were queued.
+# Workers on several machines need the file on a filesystem with working SQLite locking.
+
+PENDING = 0
+RUNNING = 1
+DONE = 2
+
+LEASE_SECONDS = 10 * 60
+MAX_ATTEMPTS = 3
+
+
+def shard_of(repo, shards):
+    digest = hashlib.sha1(repo.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+
+class WorkQueue:
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # Autocommit; claims run in explicit IMMEDIATE transactions
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.executescript('''
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS items (
+                repo_index INTEGER NOT NULL,
+                check_index INTEGER NOT NULL,
+                repo TEXT NOT NULL,
+                check_name TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                PRIMARY KEY (repo_index, check_index)
+            );
+            CREATE INDEX IF NOT EXISTS items_claim ON items (shard, state, repo_index);
+            CREATE INDEX IF NOT EXISTS items_repo ON items (repo, check_name);
+            CREATE INDEX IF NOT EXISTS items_owner ON items (owner, state);
+        ''')
+
+    @contextmanager
+    def _transaction(self):
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        self._db.execute('COMMIT')
+
+    def create(self, repos, checks, shards):
+        # Replaces whatever the file held before
+        with self._transaction():
+            self._db.execute('DELETE FROM items')
+            self._db.execute('DELETE FROM meta')
+            self._db.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('checks', json.dumps(list(checks))),
+                ('shards', json.dumps(shards)),
+                ('created_at', json.dumps(time.time())),
+            ])
+            self._db.executemany(
+                'INSERT INTO items (repo_index, check_index, repo, check_name, shard) VALUES (?, ?, ?, ?, ?)',
+                ((repo_index, check_index, repo, check, shard_of(repo, shards))
+                 for repo_index, repo in enumerate(repos) for check_index, check in enumerate(checks))
+            )
+
+    def _meta(self, key):
+        row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            raise ValueError(f"{self.path} is not a work queue")
+        return json.loads(row[0])
+
+    def checks(self):
+        return self._meta('checks')
+
+    def shards(self):
+        return self._meta('shards')
+
+    def repos(self):
+        return [row[0] for row in self._db.execute(
+            'SELECT repo FROM items WHERE check_index = 0 ORDER BY repo_index')]
+
+    def claim(self, worker, shard, count):
+        # Returns (repos, stolen); an empty list once no shard has claimable work left
+        now = time.time()
+        claimable = f'(state = {PENDING} OR (state = {RUNNING} AND lease_until < ?))'
+        with self._transaction():
+            self._give_up(now)
+            rows = self._db.execute(
+                f'SELECT DISTINCT repo_index FROM items WHERE shard = ? AND {claimable} ORDER BY repo_index LIMIT ?',
+                (shard, now, count)
+            ).fetchall()
+            stolen = False
+            if not rows:
+                busiest = self._db.execute(
+                    f'SELECT shard FROM items WHERE {claimable} GROUP BY shard ORDER BY COUNT(*) DESC LIMIT 1', (now,)
+                ).fetchone()
+                if busiest is None:
+                    return [], False
+                # Steal from the end of the shard, away from where its own worker claims
+                rows = self._db.execute(
+                    f'SELECT DISTINCT repo_index FROM items WHERE shard = ? AND {claimable} ORDER BY repo_index DESC LIMIT ?',
+                    (busiest[0], now, count)
+                ).fetchall()
+                stolen = True
+            indexes = sorted(row[0] for row in rows)
+            placeholders = ','.join('?' * len(indexes))
+            self._db.execute(
+                f'UPDATE items SET state = {RUNNING}, owner = ?, lease_until = ?, attempts = attempts + 1 '
+                f'WHERE repo_index IN ({placeholders}) AND {claimable}',
+                [worker, now + LEASE_SECONDS, *indexes, now]
+            )
+            repos = [row[0] for row in self._db.execute(
+                f'SELECT repo FROM items WHERE check_index = 0 AND repo_index IN ({placeholders}) ORDER BY repo_index',
+                indexes
+            )]
+        return repos, stolen
+
+    def _give_up(self, now):
+        # Items whose claims keep expiring (e.g. a check that takes its worker down) are not retried forever
+        stuck = self._db.execute(
+            f'SELECT repo_index, check_index, attempts FROM items '
+            f'WHERE state = {RUNNING} AND lease_until < ? AND attempts >= ?', (now, MAX_ATTEMPTS)
+        ).fetchall()
+        for repo_index, check_index, attempts in stuck:
+            result = error(f"Error: work item abandoned after {attempts} attempts")
+            self._db.execute(
+                f'UPDATE items SET state = {DONE}, result = ? WHERE repo_index = ? AND check_index = ?',
+                (json.dumps(result.to_dict()), repo_index, check_index)
+            )
+
+    def complete(self, worker, repo, results):
+        with self._transaction():
+            self._db.executemany(
+                f'UPDATE items SET state = {DONE}, owner = ?, result = ? '
+                f'WHERE repo = ? AND check_name = ? AND state != {DONE}',
+                [(worker, json.dumps(result.to_dict()), repo, check) for check, result in results.items()]
+            )
+            # Finishing a repo shows the worker is alive; its other claims get a fresh lease
+            self._db.execute(
+                f'UPDATE items SET lease_until = ? WHERE owner = ? AND state = {RUNNING}',
+                (time.time() + LEASE_SECONDS, worker)
+            )
+
+    def progress(self):
+        # Item counts per state
+        counts = dict(self._db.execute('SELECT state, COUNT(*) FROM items GROUP BY state').fetchall())
+        return {'pending': counts.get(PENDING, 0), 'running': counts.get(RUNNING, 0), 'done': counts.get(DONE, 0)}
+
+    def results(self):
+        # (repo, {check: CheckResult}) in queue order, one repo at a time
+        cursor = self._db.execute('SELECT repo, check_name, result FROM items ORDER BY repo_index, check_index')
+        repo, results = None, {}
+        for row_repo, check, result in cursor:
+            if row_repo != repo and repo is not None:
+                yield repo, results
+                results = {}
+            repo = row_repo
+            results[check] = CheckResult.from_dict(json.loads(result))
+        if repo is not None:
+            yield repo, results
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,81 @@
+from utils.blob_cache import cached_blob_artifact
+from utils.github_api import gh_api, next_page_url
+from utils.keyword_matcher import workflow_keywords
+from utils.repo_files import decode_content, fetch_blob_text, get_file_index
+from utils.request_cache import current_cache, scoped_memo
+
+# Per-repo corpus of GitHub Actions workflow files
+# The workflow list (/actions/workflows) only carries metadata; the file content has to be
+# read from the repository itself. Each workflow file is fetched once per repo scope, by the
+# blob sha from the file index (through the content-addressed blob cache, utils/blob_cache.py)
+# or through /contents/{path} when no index is available, decoded once and shared by every
+# workflow-scanning check. Keyword lookups go through the shared single-pass matcher
+# (utils/keyword_matcher.py), so each file is scanned once for all checks.
+
+
+class WorkflowFile:
+    def __init__(self, name, path, text, sha=None):
+        self.name = name
+        self.path = path
+        self.sha = sha
+        self.text = text
+        self.lowered = text.lower()
+        self._found = None      # (matcher version, keywords found)
+
+    def keywords(self, group):
+        # Keywords of a registered group found in this file; the file is scanned once for all groups
+        found = self._found
+        if found is None or found[0] != workflow_keywords.version:
+            version = workflow_keywords.version
+            # Hits depend only on the blob and the registered keywords, so they are cached by both
+            hits = cached_blob_artifact(
+                self.sha, f'keyword_hits:{workflow_keywords.signature}',
+                lambda: sorted(workflow_keywords.scan(self.lowered))
+            )
+            found = (version, frozenset(hits))
+            self._found = found
+        return workflow_keywords.matches(group, found[1])
+
+
+def fetch_workflow_text(repo, path, sha):
+    if sha:
+        return fetch_blob_text(repo, sha)
+    result = gh_api(f'/repos/{repo}/contents/{path}')
+    if not result.ok:
+        return None
+    data = result.json()
+    return decode_content(data) if isinstance(data, dict) else None
+
+
+def load_workflows(repo):
+    # Same first page URL as the checks that only look at workflow names, so it is shared
+    url = f'/repos/{repo}/actions/workflows'
+    workflows = []
+    while url:
+        result = gh_api(url)
+        if not result.ok:
+            return None if not workflows else load_workflow_files(repo, workflows)
+        workflows.extend(result.json().get('workflows', []))
+        url = next_page_url(result)
+    return load_workflow_files(repo, workflows)
+
+
+def load_workflow_files(repo, workflows):
+    # Outside a request scope the index would be built just for this call; use /contents/ instead
+    index = get_file_index(repo) if current_cache() is not None else None
+    files = []
+    for workflow in workflows:
+        path = workflow.get('path') or ''
+        # Dynamic workflows (e.g. default CodeQL setup) have no file in the repository
+        if not path.startswith('.github/workflows/'):
+            continue
+        sha = index.sha(path) if index is not None else None
+        text = fetch_workflow_text(repo, path, sha)
+        if text is not None:
+            files.append(WorkflowFile(workflow.get('name') or path, path, text, sha))
+    return files
+
+
+def get_workflows(repo):
+    # None when the workflow list is not readable
+    return scoped_memo(('workflows', repo), lambda: load_workflows(repo))